@@ -1,16 +1,11 @@
 #!/usr/bin/env python3
 from typing import IO
-from enum import Enum
+import argparse
 import sys
+from pyart import Shapes, OutputSink
 
 # @author Anthea Blais
 
-class Shapes(Enum):
-    """ Enumerator shapes class"""
-    CIRCLE = 0
-    RECTANGLE = 1
-    ELLIPSE = 2
-
 class HtmlDoc:
     """ Class that writes all html related tags into the file"""
 
@@ -24,7 +19,7 @@ class HtmlDoc:
         """
         
         self.title = title
-        self.file: IO = open(file,'w')
+        self.file: OutputSink = OutputSink(file,'w')
         self.indents: int = 0
         self.write_header()
 
@@ -43,7 +38,6 @@ class HtmlDoc:
         """
         tabs: str = HtmlDoc.IDENTATION * self.indents
         self.file.write(f'{tabs}{content}\n')
-        self.file.flush()
 
     def write_header(self) -> None:
         """ writes the beggining of the html file """
@@ -55,26 +49,39 @@ class HtmlDoc:
         self.decrease_indent()
         self.append('</head>')
         self.append('<body>')
+        self.file.flush() #the header is on the disk before a SvgCanvas with a handle of its own writes after it
         
     
 class SvgCanvas:
     """ Class that writes svg related elements into html file """
     IDENTATION = "  "
-    def __init__(self,file: IO, width: int = 1000, height: int = 1000, shape: Shapes = 0, shape_type: str = "none", indents: int = 0) -> None:
+    COPIES = 5 #shapes in every row of the pattern
+    SPACING = {"circle": 100, "rectangle": 125, "ellipse": 125} #how far apart the copies in a row are
+    ROW_GAP = 400 #how far apart the pairs of rows of a pattern are
+    CHUNK_SIZE = 1 << 16 #most pattern instances formatted in one write
+    def __init__(self,file: str | IO, width: int = 1000, height: int = 1000, shape: Shapes = 0, shape_type: str = "none", indents: int = 0, reuse: bool = False, pattern: list | None = None) -> None:
         """ initializes the class
                 parameters:
-                    file - IO, 
-                    width - int,
-                    height - int,
-                    shape - 
+                    file - str | IO, the name of the html file (opened to append to), or the already open file of the HtmlDoc
+                    width - int, width of the svg canvas
+                    height - int, height of the svg canvas
+                    shape - the first shape of the pattern
+                    shape_type - string that contains the shape type name
+                    indents - int, the number of indents used for a line
+                    reuse - bool, writes every row's shape once inside <defs> and each copy as a <use> of it
+                    pattern - list, pattern transforms (Grid, Radial, Scale, Fade) the first shape of every row is expanded through instead of the row of copies
         
         """
-        self.file: IO = open(file, 'a')
+        #a file of its own is flushed once every element is written so it stays in order with the HtmlDoc's handle
+        self.owns_file: bool = isinstance(file, str)
+        self.file: OutputSink | IO = OutputSink(file, 'a') if self.owns_file else file
         self.width = width
         self.height = height
         self.indents = indents
         self.shape = shape 
         self.shape_type = shape_type
+        self.reuse = reuse
+        self.pattern = pattern
 
     def append(self, content: str) -> None:
         """ appends together the formatted string and the associated number of tabs to be output into html file
@@ -83,7 +90,11 @@ class SvgCanvas:
         """
         tabs: str = SvgCanvas.IDENTATION * self.indents
         self.file.write(f'{tabs}{content}\n')
-        self.file.flush()
+
+    def end_element(self) -> None:
+        """ flushes a file of its own once a whole element is written, the HtmlDoc's file is flushed when it is closed"""
+        if self.owns_file:
+            self.file.flush()
     
     def increase_indent(self) -> None:
         """ increases the indent inside of the html file"""
@@ -101,47 +112,70 @@ class SvgCanvas:
         self.increase_indent()
         self.mid_body(self.shape_type)
 
+    def rows(self, shape_type: str) -> list[tuple[any, int]]:
+        """ Returns the first shape of every row of the pattern and how far apart the copies in that row are
+                parameters: 
+                    shape_type - string that contains the shape type name
+        """
+        #the red row starts with the canvas' own shape and the blue row 200 below it
+        if(shape_type == "circle"):
+            blue = CircleShape((50,250,50,"rgb(0, 0, 255)",1.0))
+        elif(shape_type == "rectangle"):
+            blue = RectangleShape((50,250,100,100,"rgb(0, 0, 255)","1.0"))
+        elif(shape_type == "ellipse"):
+            blue = EllipseShape((50,250,50,20,"rgb(0, 0, 255)"))
+        else:
+            return []
+        return [(self.shape, SvgCanvas.SPACING[shape_type]), (blue, SvgCanvas.SPACING[shape_type])]
 
     def mid_body(self,shape_type: str) -> None:
         """ Writes the actual shape into the html file depending on what specific shape is chosen
                 parameters: 
                     shape_type - string that contains the shape type name
         """
-        #determines what shape was given as input 
-        if(shape_type == "circle"):
-            self.append(self.shape.write_line()) #writes the first the formatted line into html file
-            for i in range(0,4): #loops to modify each red shape
-                self = SvgCanvas.gen_art(shape=self.shape,shape_type=self.shape_type,edit=100)
-                self.append(self.shape.write_line()) #writes the rest of formatted shape lines into html file
-            
-            #resets so we can repeat to write the blue shapes in file
-            self = SvgCanvas(file = "part1.html",width=1000,height=1000,shape=CircleShape((50,250,50,"rgb(0, 0, 255)",1.0)),shape_type="circle",indents=2)
-            self.append(self.shape.write_line())
-            for i in range(0,4):
-                self = SvgCanvas.gen_art(shape=self.shape,shape_type=self.shape_type,edit=100)
-                self.append(self.shape.write_line())
+        rows: list[tuple[any, int]] = self.rows(shape_type)
+        if self.reuse:
+            self.write_uses(shape_type, rows)
+        elif self.pattern is not None:
+            self.write_pattern([shape for shape, edit in rows])
+        else:
+            for shape, edit in rows:
+                self.append(shape.write_line()) #writes the first the formatted line into html file
+                for i in range(SvgCanvas.COPIES - 1): #every copy is the one before it moved edit to the right
+                    shape = translate(shape, shape_type, edit)
+                    self.append(shape.write_line()) #writes the rest of formatted shape lines into html file
+        self.end_element()
 
-        elif(shape_type == "rectangle"):
-            self.append(self.shape.write_line())
-            for i in range(0,4):
-                self = SvgCanvas.gen_art(shape=self.shape,shape_type=self.shape_type, edit=125)
-                self.append(self.shape.write_line())
-            self = SvgCanvas(file = "part1.html",width=1000,height=1000,shape=RectangleShape((50,250,100,100,"rgb(0, 0, 255)","1.0")),shape_type="rectangle",indents=2)
-            self.append(self.shape.write_line())
-            for i in range(0,4):
-                self = SvgCanvas.gen_art(shape=self.shape,shape_type=self.shape_type,edit=125)
-                self.append(self.shape.write_line())
+    def write_uses(self, shape_type: str, rows: list[tuple[any, int]]) -> None:
+        """ Writes the first shape of every row once inside <defs> and every copy as a <use> that moves it
+                parameters: 
+                    shape_type - string that contains the shape type name
+                    rows - list, the first shape of every row and how far apart its copies are
+        """
+        self.append('<defs>')
+        self.increase_indent()
+        for number, (shape, edit) in enumerate(rows):
+            line: str = shape.write_line()
+            self.append(line.replace(' ', f' id="{shape_type}{number}" ', 1)) #the id goes right after the tag name
+        self.decrease_indent()
+        self.append('</defs>')
 
-        elif(shape_type == "ellipse"):
-            self.append(self.shape.write_line())
-            for i in range(0,4):
-                self = SvgCanvas.gen_art(shape=self.shape,shape_type=self.shape_type,edit=125)
-                self.append(self.shape.write_line())
-            self = SvgCanvas(file = "part1.html",width=1000,height=1000,shape=EllipseShape((50,250,50,20,"rgb(0, 0, 255)")),shape_type="ellipse",indents=2)
-            self.append(self.shape.write_line())
-            for i in range(0,4):
-                self = SvgCanvas.gen_art(shape=self.shape,shape_type=self.shape_type,edit=125)
-                self.append(self.shape.write_line())
+        for number, (shape, edit) in enumerate(rows):
+            self.append(f'<use href="#{shape_type}{number}"></use>')
+            for i in range(1, SvgCanvas.COPIES):
+                self.append(f'<use href="#{shape_type}{number}" x="{edit * i}"></use>')
+
+    def write_pattern(self, shapes: list[any]) -> None:
+        """ Expands the shapes through the pattern in one vectorized step and writes every instance, a chunk of lines per write
+                parameters: 
+                    shapes - list, the base shapes of the pattern
+        """
+        from pattern import A41_TEMPLATES, expand, from_fields #NumPy is only needed for patterns
+        from pyart.serialize import format_lines
+
+        instances = expand(from_fields([shape.fields() for shape in shapes]), self.pattern)
+        for start in range(0, len(instances), SvgCanvas.CHUNK_SIZE):
+            self.file.write(format_lines(instances.take(slice(start, start + SvgCanvas.CHUNK_SIZE)), self.indents, A41_TEMPLATES))
 
     def end_body(self) -> None:
         """ writes the end of the html file. """
@@ -150,29 +184,41 @@ class SvgCanvas:
         self.decrease_indent()
         self.append('</body>')
         self.append('</html>')
+        self.end_element()
 
     
     @classmethod
-    def gen_art(cls,shape, shape_type: str,edit: int) -> any:
+    def gen_art(cls,shape, shape_type: str,edit: int, file: str | IO = "part1.html") -> any:
         """ Determines/modifies the shape that will be written into the file
                 Parameters:
                     shape - The actual shape 
                     shape_type - the string with the shape name
                     edit - position modification that will apply to new shape 
+                    file - str | IO, the html file, pass an open one so no new handle is opened
 
                 returns:
                     modification to svg class such that a new shape is written into file
         
         """
-        #modifies class position and colour based on the  shape
-        if(shape_type == "circle"):
-            return cls(file="part1.html",width = 1000,height = 1000, shape=CircleShape((edit + shape.cx,shape.cy,shape.r,shape.fill,shape.opacity)),shape_type="circle",indents = 2)
-        
-        elif(shape_type == "rectangle"):
-            return cls(file = "part1.html", width = 1000, height = 1000, shape = RectangleShape((edit + shape.x,shape.y,shape.width, shape.height, shape.fill, shape.opacity)), shape_type = "rectangle", indents = 2)
-        
-        elif(shape_type == "ellipse"):
-            return cls(file = "part1.html", width = 1000, height = 1000, shape = EllipseShape((edit + shape.cx, shape.cy, shape.rx,shape.ry, shape.fill)), shape_type="ellipse", indents = 2)
+        return cls(file = file, width = 1000, height = 1000, shape = translate(shape, shape_type, edit), shape_type = shape_type, indents = 2)
+
+
+def translate(shape, shape_type: str, edit: int) -> any:
+    """ Returns a copy of the shape moved edit to the right
+            Parameters:
+                shape - The actual shape 
+                shape_type - the string with the shape name
+                edit - position modification that will apply to new shape 
+    """
+    #modifies the position based on the shape
+    if(shape_type == "circle"):
+        return CircleShape((edit + shape.cx,shape.cy,shape.r,shape.fill,shape.opacity))
+    
+    elif(shape_type == "rectangle"):
+        return RectangleShape((edit + shape.x,shape.y,shape.width, shape.height, shape.fill, shape.opacity))
+    
+    elif(shape_type == "ellipse"):
+        return EllipseShape((edit + shape.cx, shape.cy, shape.rx,shape.ry, shape.fill))
      
 class CircleShape:
     """Class that creates a circle"""
@@ -194,6 +240,10 @@ class CircleShape:
         """
         return (f'<circle cx="{self.cx}" cy="{self.cy}" r="{self.r}" fill="{self.fill}" fill-opacity="{self.opacity}"></circle>')
 
+    def fields(self) -> dict:
+        """ returns the circle as pattern fields"""
+        return dict(shape=Shapes.CIRCLE.value, x=self.cx, y=self.cy, rad=self.r, opacity=self.opacity, **rgb(self.fill))
+
 class RectangleShape:
     """Class that creates a rectangle"""
 
@@ -214,6 +264,10 @@ class RectangleShape:
                 returns - formatted string
         """
         return (f'<rect x="{self.x}" y="{self.y}" width="{self.width}" height="{self.height}" style="fill:{self.fill};fill-opacity:{self.opacity}"></rect>')
+
+    def fields(self) -> dict:
+        """ returns the rectangle as pattern fields"""
+        return dict(shape=Shapes.RECTANGLE.value, x=self.x, y=self.y, width=self.width, height=self.height, opacity=self.opacity, **rgb(self.fill))
          
 
 class EllipseShape:
@@ -236,23 +290,66 @@ class EllipseShape:
         """
         return (f'<ellipse cx="{self.cx}" cy="{self.cy}" rx="{self.rx}" ry="{self.ry}" style="fill:{self.fill}"></ellipse>')
 
+    def fields(self) -> dict:
+        """ returns the ellipse as pattern fields"""
+        return dict(shape=Shapes.ELLIPSE.value, x=self.cx, y=self.cy, rx=self.rx, ry=self.ry, **rgb(self.fill))
+
+
+def rgb(fill: str) -> dict:
+    """ returns the red, green and blue numbers of a "rgb(r, g, b)" fill"""
+    red, green, blue = (int(number) for number in fill.strip()[4:-1].split(','))
+    return dict(red=red, green=green, blue=blue)
+
 
 def main() -> None:
     """main method"""
     #list = [Shapes.CIRCLE.name,Shapes.RECTANGLE.name,Shapes.RECTANGLE.name]
     #print(f'shape types: {", ".join(list)}')
     #return 0
+    parser = argparse.ArgumentParser(description="Writes a pattern of red and blue shapes into part1.html")
+    parser.add_argument("--shape", choices=list(SvgCanvas.SPACING), default="circle", help="the shape every row is made of")
+    parser.add_argument("--defs", action='store_true', help="writes every row's shape once in <defs> and its copies as <use> references")
+    parser.add_argument("--copies", type=int, default=SvgCanvas.COPIES, help="shapes in every row")
+    parser.add_argument("--rows", type=int, default=1, help="pairs of rows, each one 400 below the one before it")
+    parser.add_argument("--radial", type=int, metavar='COUNT', help="then repeats every shape COUNT times around the centre of the canvas")
+    parser.add_argument("--scale", nargs=3, type=float, metavar=('COUNT', 'FIRST', 'LAST'), help="then stacks COUNT copies of every shape, sized from FIRST to LAST times its size")
+    parser.add_argument("--fade", nargs=4, type=int, metavar=('COUNT', 'RED', 'GREEN', 'BLUE'), help="then makes COUNT copies of every shape, coloured from its own colour to RED GREEN BLUE")
+    args = parser.parse_args()
+    #the counts are checked here so a bad one is a usage error rather than a traceback from the pattern engine
+    counts: dict = {"--copies": args.copies, "--rows": args.rows, "--radial": args.radial, "--scale": args.scale and args.scale[0], "--fade": args.fade and args.fade[0]}
+    for flag, count in counts.items():
+        if count is not None and (count < 1 or count != int(count)):
+            parser.error(f"{flag}: COUNT {count:g} must be a whole number of at least 1")
+    if args.scale and min(args.scale[1:]) <= 0:
+        parser.error("--scale: FIRST and LAST must be greater than 0")
+    if args.fade and not all(0 <= colour <= 255 for colour in args.fade[1:]):
+        parser.error("--fade: RED, GREEN and BLUE must be within 0 and 255")
+
+    #any pattern option writes the rows through the vectorized pattern engine instead
+    pattern: list | None = None
+    if args.copies != SvgCanvas.COPIES or args.rows != 1 or args.radial or args.scale or args.fade:
+        if args.defs:
+            parser.error("--defs only writes the default rows")
+        from pattern import Grid, Radial, Scale, Fade
+        pattern = [Grid(args.copies, args.rows, SvgCanvas.SPACING[args.shape], SvgCanvas.ROW_GAP)]
+        if args.radial:
+            pattern.append(Radial(args.radial, 500, 500))
+        if args.scale:
+            pattern.append(Scale(int(args.scale[0]), args.scale[1], args.scale[2]))
+        if args.fade:
+            pattern.append(Fade(*args.fade))
 
     with open('part1.html', 'a') as sys.stdout:
         doc = HtmlDoc(file="part1.html",title="My Art Part 1!!")
         
-        #different shape options
-        #svg = SvgCanvas(file = "part1.html",width=1000,height=1000,shape=EllipseShape((50,50,50,20,"rgb(255, 0, 0)")),shape_type="ellipse")
-        #svg = SvgCanvas(file = "part1.html",width=1000,height=1000,shape=RectangleShape((50,50,100,100,"rgb(255, 0, 0)","1.0")),shape_type="rectangle")
-        svg = SvgCanvas(file = "part1.html",width=1000,height=1000,shape=CircleShape((50,50,50,"rgb(255, 0, 0)",1.0)),shape_type="circle")
+        #the red shape the first row starts with, for each shape option
+        shapes: dict = {"circle": CircleShape((50,50,50,"rgb(255, 0, 0)",1.0)), "rectangle": RectangleShape((50,50,100,100,"rgb(255, 0, 0)","1.0")),
+                        "ellipse": EllipseShape((50,50,50,20,"rgb(255, 0, 0)"))}
+        svg = SvgCanvas(file = doc.file,width=1000,height=1000,shape=shapes[args.shape],shape_type=args.shape,reuse=args.defs,pattern=pattern)
        
         svg.start_body() #begins writting the html body
         svg.end_body() #finished writting the end of the body
+        doc.file.close()
     
 
 if __name__ == "__main__":
@@ -1,48 +1,18 @@
-from typing import NamedTuple, IO
-from enum import Enum
+import argparse
+import os
 import random as rd
-import sys
+import pyart
+from pyart import Shapes, IntRange, Colours, CHUNK_SIZE, ShapeStream, gen_int, gen_float, root_entropy, OutputSink
 
 # @author Anthea Blais
 
-class Shapes(Enum):
-    """ Enum class for different shapes"""
-    CIRCLE = 0
-    RECTANGLE = 1
-    ELLIPSE = 2
-    
-class FloatRange(NamedTuple):
-    """class for the float ranges"""
-    fmin: float
-    fmax: float
-
-class IntRange(NamedTuple):
-    """class for the integer ranges"""
-    imin: int
-    imax: int
-
-class Colours(NamedTuple):
-    """Class for the different colours"""
-    red: IntRange
-    green: IntRange
-    blue: IntRange
-    opacity: FloatRange
-
-# STATIC FUNCTIONS
-def gen_int(r: IntRange) -> int:
-    """Generates a random integer"""
-    return rd.randint(r.imin, r.imax)
-
-def gen_float(r: FloatRange) -> float:
-    """Generates a random float"""
-    return round(rd.uniform(r.fmin,r.fmax),2) #rounds to 2 decimal places
-
+SMALL_TABLE: int = 2_000 #up to this many rows, writing them one Table at a time takes less time than loading NumPy
 
 class PyArtConfig:
     """ Class which sets the configurations for shapes to be displayed"""
     
     counter: int = 0 #counts the number of shapes created
-    def __init__(self, x: IntRange, y: IntRange, rad: IntRange, rx: IntRange, ry: IntRange, width: IntRange, height: IntRange, red: Colours.red, green: Colours.green, blue: Colours.blue, opacity: Colours.opacity) -> None:
+    def __init__(self, x: IntRange, y: IntRange, rad: IntRange, rx: IntRange, ry: IntRange, width: IntRange, height: IntRange, red: Colours.red, green: Colours.green, blue: Colours.blue, opacity: Colours.opacity, rng: rd.Random | None = None) -> None:
         """ Initiates the class and sets configurations 
                 parameters:
                     x - IntRange, determines random x coordinate of shape within constraints
@@ -56,19 +26,20 @@ class PyArtConfig:
                     green - (Colours.green) IntRange, random determines green rgb number within constraints
                     blue - (Colours.blue) IntRange, random determines blue rgb number within constraints
                     opacity - (Colours.opacity) Intrange, random determines the opactiy within constraints
+                    rng - random.Random, seeded generator the numbers are drawn from (global random module if None)
     
         """
-        self.x = gen_int(x)
-        self.y = gen_int(y)
-        self.rad = gen_int(rad)
-        self.rx = gen_int(rx)
-        self.ry = gen_int(ry)
-        self.width = gen_int(width)
-        self.height = gen_int(height)
-        self.red = gen_int(red)
-        self.green = gen_int(green)
-        self.blue = gen_int(blue)
-        self.opacity = gen_float(opacity)
+        self.x = gen_int(x, rng)
+        self.y = gen_int(y, rng)
+        self.rad = gen_int(rad, rng)
+        self.rx = gen_int(rx, rng)
+        self.ry = gen_int(ry, rng)
+        self.width = gen_int(width, rng)
+        self.height = gen_int(height, rng)
+        self.red = gen_int(red, rng)
+        self.green = gen_int(green, rng)
+        self.blue = gen_int(blue, rng)
+        self.opacity = gen_float(opacity, rng)
         PyArtConfig.counter +=1
 
     
@@ -80,6 +51,9 @@ class PyArtConfig:
 
 class CircleShape: 
     """ Class to create a circle"""
+    __slots__ = ('x', 'y', 'rad', 'red', 'green', 'blue', 'opacity', 'shape_name')
+    rx = ry = width = height = None #fields a circle does not have, shared by every instance
+
     def __init__(self, config: PyArtConfig, shape_name: Shapes) -> None:
         """ Initalizes the CircleShape class
                 parameters:
@@ -89,10 +63,6 @@ class CircleShape:
         self.x = config.x
         self.y = config.y
         self.rad = config.rad
-        self.rx = None
-        self.ry = None
-        self.width = None
-        self.height = None
         self.red = config.red
         self.green = config.green
         self.blue = config.blue
@@ -105,6 +75,9 @@ class CircleShape:
 
 class RectangleShape:
     """ Class to create a rectangle"""
+    __slots__ = ('x', 'y', 'width', 'height', 'red', 'green', 'blue', 'opacity', 'shape_name')
+    rad = rx = ry = None #fields a rectangle does not have, shared by every instance
+
     def __init__(self, config: PyArtConfig, shape_name: Shapes) -> None:
         """ Initalizes the RectangleShape class
                 parameters:
@@ -113,9 +86,6 @@ class RectangleShape:
         """
         self.x = config.x
         self.y = config.y
-        self.rad = None
-        self.rx = None
-        self.ry = None
         self.width = config.width
         self.height = config.height
         self.red = config.red
@@ -132,6 +102,9 @@ class RectangleShape:
 class EllipseShape:
     """ Class to create a ellipse"""
     
+    __slots__ = ('x', 'y', 'rx', 'ry', 'red', 'green', 'blue', 'opacity', 'shape_name')
+    rad = width = height = None #fields an ellipse does not have, shared by every instance
+
     def __init__(self, config: PyArtConfig, shape_name: Shapes) -> None:
         """ Initalizes the EllipseShape class
                 parameters:
@@ -140,11 +113,8 @@ class EllipseShape:
         """
         self.x = config.x
         self.y = config.y
-        self.rad = None
         self.rx = config.rx
         self.ry = config.ry
-        self.width = None
-        self.height = None
         self.red = config.red
         self.green = config.green
         self.blue = config.blue
@@ -159,17 +129,33 @@ class EllipseShape:
 class HtmlDoc:
     """ Class that writes to the html file"""
     IDENTATION = "  "
-    def __init__(self, file: str,title: str) -> None:
+    def __init__(self, file: str,title: str, sink: OutputSink | None = None) -> None:
         """ Initalizes the class
                 parameters:
-                    file - str, the name of the file
+                    file - str, the name of the file (ignored when sink is given)
                     title - str, title of the html document
+                    sink - OutputSink, an already open sink to write to instead of file
         """
         self.title = title
-        self.__file: IO = open(file,'w')
+        self.__sink: OutputSink = OutputSink(file, 'w') if sink is None else sink
         self.__indents: int = 0
         self.write_header()
 
+    def __enter__(self) -> "HtmlDoc":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def sink(self) -> OutputSink:
+        """ returns the output sink shared with every Table and TableWriter of this document"""
+        return self.__sink
+
+    def close(self) -> None:
+        """ flushes and closes the html file"""
+        self.__sink.close()
+
     def increase_indent(self) -> None:
         """ increase the indent inside of the html file"""
         self.__indents += 1
@@ -181,8 +167,7 @@ class HtmlDoc:
     def append(self, content: str) -> None:
         """ appends together the formatted string and the associated number of tabs to be output into html file"""
         tabs: str = HtmlDoc.IDENTATION * self.__indents
-        self.__file.write(f'{tabs}{content}\n')
-        self.__file.flush()
+        self.__sink.write(f'{tabs}{content}\n')
 
     def write_header(self) -> None:
         """ writes the beggining of the html file"""
@@ -255,15 +240,15 @@ class RandomShape:
 class Table:
     """ class that writes the table into the html file"""
     INDENTATION = "  "
-    def __init__(self,file: IO, shape: Shapes, indents: int, config: PyArtConfig) -> None:
+    def __init__(self,sink: OutputSink, shape: Shapes, indents: int, config: PyArtConfig) -> None:
         """Initalizes the class
                 parameters:
-                    file - IO, the html file
+                    sink - OutputSink, the shared output of the html file (HtmlDoc.sink)
                     shapes - Shapes, the type of shape 
                     indents - int, the number of indents needed (if its greater than 1)
                     config - PyArtConfig, The configurations/constraints for each shape
         """
-        self.__file: IO = open(file, 'a')
+        self.__sink = sink
         self.__config = config
         self.__indents = indents
 
@@ -281,8 +266,7 @@ class Table:
     def append(self, content: str) -> None:
         """ appends together the formatted string and the associated number of tabs to be output into html file"""
         tabs: str = Table.INDENTATION * self.__indents
-        self.__file.write(f'{tabs}{content}\n')
-        self.__file.flush()
+        self.__sink.write(f'{tabs}{content}\n')
 
     def elements(self) -> None:
         """ writes the actual table elements in the html file"""
@@ -319,21 +303,202 @@ class Table:
         self.append("</body>")
         self.append("</html>")
         
+class TableWriter:
+    """ class that writes whole blocks of table rows into the html file, the batched version of Table"""
+
+    VIEWPORT: IntRange = IntRange(0, 1000) #the range of x and y, the other constraints are pyart's DEFAULT_RANGES
+
+    def __init__(self, sink: OutputSink, count: int = 1) -> None:
+        """Initalizes the class
+                parameters:
+                    sink - OutputSink, the shared output of the html file (HtmlDoc.sink)
+                    count - int, the number in the CNT cell of the next row
+        """
+        self.__sink = sink
+        self.count = count
+
+    def rows(self, columns) -> None:
+        """ writes one row for every shape of a ShapeColumns batch, formatted all at once"""
+        from pyart.serialize import format_rows
+        self.__sink.write(format_rows(columns, self.count), len(columns))
+        self.count += len(columns)
+
+    def generate(self, count: int, chunk_size: int, seed: int | None = None) -> None:
+        """ generates count random shapes chunk_size at a time and writes a row for each, so memory does not grow with count"""
+        from pipeline import generate_shapes
+        for chunk in generate_shapes(constraints(), count, chunk_size=chunk_size, seed=seed):
+            self.rows(chunk)
+
+    def end(self) -> None:
+        """ Ends the table block and the html file, the same as Table.end """
+        self.__sink.write('    </table>\n  </body>\n  </html>\n')
+
+class PagedTable:
+    """ class that splits the table over numbered page files, or JSON data shards the page loads as it is scrolled, plus an index page"""
+
+    #loads the next shard whenever the reader gets near the bottom of the page
+    SHARD_SCRIPT: str = """<script>
+      const shards = {pages}, table = document.querySelector("table");
+      let next = 0, loading = false;
+      async function more() {{
+        if (loading || next >= shards) return;
+        loading = true;
+        const name = "{stem}-" + String(++next).padStart({width}, "0") + ".json";
+        for (const row of (await (await fetch(name)).json()).rows) {{
+          const tr = table.insertRow();
+          for (const cell of row) tr.insertCell().textContent = cell === null ? "None" : cell;
+        }}
+        loading = false;
+        if (document.body.scrollHeight <= innerHeight + scrollY + 500) more();
+      }}
+      addEventListener("scroll", () => {{ if (innerHeight + scrollY >= document.body.scrollHeight - 500) more(); }});
+      more();
+    </script>"""
+
+    def __init__(self, file: str, title: str, page_size: int, shards: bool = False) -> None:
+        """Initalizes the class
+                parameters:
+                    file - str, the name of the index page, pages are named after it (part2.html gives part2-0001.html ...)
+                    title - str, title of the html documents
+                    page_size - int, the number of rows on a page or in a shard
+                    shards - bool, writes JSON shards loaded on scroll instead of html pages
+        """
+        self.file = file
+        self.title = title
+        self.page_size = page_size
+        self.shards = shards
+        self.__stem, self.__extension = os.path.splitext(file)
+        self.__width: int = 4
+        self.__page: OutputSink | None = None
+        self.__rows: int = 0 #rows written so far, over every page
+        self.__first: bool = True #whether the open shard has no rows yet
+
+    def page_name(self, number: int) -> str:
+        """ returns the file name of page (or shard) number"""
+        return f'{self.__stem}-{number:0{self.__width}d}{".json" if self.shards else self.__extension}'
+
+    def generate(self, count: int, chunk_size: int, seed: int | None = None) -> int:
+        """ generates count random shapes chunk_size at a time, writes them over the pages and writes the index page
+                returns:
+                    int, the number of pages
+        """
+        from pipeline import generate_shapes
+        pages: int = max(1, -(-count // self.page_size))
+        self.__width = max(4, len(str(pages)))
+        for chunk in generate_shapes(constraints(), count, chunk_size=chunk_size, seed=seed):
+            start: int = 0
+            while start < len(chunk):
+                #fills the open page up to page_size rows, then starts the next one
+                if self.__page is None:
+                    self.__open_page(self.__rows // self.page_size + 1, pages)
+                take: int = min(len(chunk) - start, self.page_size - self.__rows % self.page_size)
+                self.__write_rows(chunk.take(slice(start, start + take)))
+                start += take
+                if self.__rows % self.page_size == 0:
+                    self.__close_page()
+        if self.__page is not None or count == 0:
+            if self.__page is None:
+                self.__open_page(1, pages)
+            self.__close_page()
+        self.__write_index(pages)
+        return pages
+
+    def __open_page(self, number: int, pages: int) -> None:
+        """ starts page number, with the table labels or the start of the JSON shard"""
+        if self.shards:
+            self.__page = OutputSink(self.page_name(number))
+            self.__page.write('{"rows":[')
+            self.__first = True
+            return
+        doc = HtmlDoc(file=self.page_name(number), title=f'{self.title} ({number} of {pages})')
+        doc.labels()
+        self.__page = doc.sink
+
+    def __write_rows(self, columns) -> None:
+        """ writes a batch of rows into the open page"""
+        from pyart.serialize import format_rows, JSON_ROW, JSON_NAMES
+        if self.shards:
+            text: str = format_rows(columns, self.__rows + 1, JSON_ROW, 'null', JSON_NAMES)
+            self.__page.write(text[1:] if self.__first else text, len(columns)) #the first row of a shard has no leading comma
+            self.__first = False
+        else:
+            TableWriter(self.__page, self.__rows + 1).rows(columns)
+        self.__rows += len(columns)
+
+    def __close_page(self) -> None:
+        """ ends and closes the open page"""
+        if self.shards:
+            self.__page.write(']}\n')
+        else:
+            TableWriter(self.__page).end()
+        self.__page.close()
+        self.__page = None
+
+    def __write_index(self, pages: int) -> None:
+        """ writes the index page, a list of links to the pages or the table that loads the shards"""
+        if self.shards:
+            with HtmlDoc(file=self.file, title=self.title) as doc:
+                doc.labels()
+                script: str = PagedTable.SHARD_SCRIPT.format(pages=pages, stem=os.path.basename(self.__stem), width=self.__width)
+                doc.sink.write(f'    </table>\n    {script}\n  </body>\n  </html>\n')
+            return
+        with OutputSink(self.file) as sink:
+            sink.write(f'<html>\n<head>\n  <title>{self.title}</title>\n</head>\n<body>\n  <ol>\n')
+            for number in range(1, pages + 1):
+                first: int = (number - 1) * self.page_size + 1
+                last: int = max(first, min(number * self.page_size, self.__rows))
+                sink.write(f'    <li><a href="{os.path.basename(self.page_name(number))}">rows {first} to {last}</a></li>\n')
+            sink.write('  </ol>\n</body>\n</html>\n')
+
+# STATIC FUNCTIONS
+def constraints() -> pyart.PyArtConfig:
+    """ returns the constraints of the table's shapes, pyart's DEFAULT_RANGES with x and y within TableWriter.VIEWPORT"""
+    return pyart.PyArtConfig.from_dict({}, TableWriter.VIEWPORT)
+
+def write_table(sink: OutputSink, count: int, chunk_size: int = CHUNK_SIZE, seed: int | None = None) -> None:
+    """ Writes count random rows one PyArtConfig and Table at a time, then the end of the html file
+            parameters:
+                sink - OutputSink, the shared output of the html file (HtmlDoc.sink)
+                count - int, the number of rows
+                chunk_size - int, the number of rows drawn from one ShapeStream
+                seed - int, the seed of the table (unseeded if None), the rows are the ones TableWriter.generate writes for it
+    """
+    ranges: pyart.PyArtConfig = constraints()
+    entropy: int = root_entropy(seed)
+    PyArtConfig.counter = 0 #the CNT cells start from 1, like TableWriter's
+    for row in range(count):
+        if row % chunk_size == 0:
+            stream: ShapeStream = ShapeStream(entropy, row // chunk_size)
+
+        #the shape type and then every field, the order gen_columns draws them in
+        shape: Shapes = Shapes(gen_int(IntRange(0,2), stream))
+        configurations: PyArtConfig = PyArtConfig(x=ranges.viewport, y=ranges.viewport, rad=ranges.rad, rx=ranges.rx, ry=ranges.ry, width=ranges.width, height=ranges.height,
+                                                  red=ranges.red, green=ranges.green, blue=ranges.blue, opacity=ranges.opacity, rng=stream)
+        Table(sink=sink, shape=shape, indents=0, config=configurations).elements()
+    TableWriter(sink).end()
+
 def main() -> None:
     """main method"""
-    
-    with open('part2.html', 'a') as sys.stdout:
-        range: int = gen_int(IntRange(0,2)) #generates the random 
-        doc = HtmlDoc(file="part2.html", title="My Table Part 2!!")
+    parser = argparse.ArgumentParser(description="Generates a table of random shapes into part2.html")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the random shapes, the same seed gives the same table")
+    parser.add_argument("--rows", type=int, default=10, help="number of shapes in the table")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="number of rows generated and written at a time")
+    parser.add_argument("--page-size", type=int, default=0, help="splits the table over numbered pages of this many rows, with part2.html as their index")
+    parser.add_argument("--shards", action='store_true', help="with --page-size, writes JSON shards that part2.html loads as it is scrolled instead of pages")
+    args = parser.parse_args()
+
+    if args.page_size > 0:
+        PagedTable("part2.html", "My Table Part 2!!", args.page_size, args.shards).generate(args.rows, args.chunk_size, args.seed)
+        return
+
+    with HtmlDoc(file="part2.html", title="My Table Part 2!!") as doc:
         doc.labels() #writes the labels for columns of table
-
-        while (PyArtConfig.get_count() < 10):
-            range: int = gen_int(IntRange(0,2))
-
-            #creates shapes based on the configurations
-            configurations: PyArtConfig = PyArtConfig(x=IntRange(0,1000), y=IntRange(0,1000), rad=IntRange(0,100),rx=IntRange(10,30), ry=IntRange(10,30), width=IntRange(10,100), height=IntRange(10,100), red=IntRange(0,255), green=IntRange(0,255), blue=IntRange(0,255), opacity=FloatRange(0.0,1.0))
-            table = Table(file="part2.html", shape=Shapes(range), indents=0,config=configurations)
-            table.elements() #writes all the elements in the table into html file
+        if args.rows <= SMALL_TABLE:
+            write_table(doc.sink, args.rows, args.chunk_size, args.seed) #a few rows are quicker to write without NumPy
+            return
+        table = TableWriter(doc.sink)
+        table.generate(args.rows, args.chunk_size, args.seed) #writes all the elements in the table into html file
         table.end() #writes the end of the html file
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
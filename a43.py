@@ -1,121 +1,22 @@
-from typing import NamedTuple, IO
-from enum import Enum
-import random as rd
+from typing import NamedTuple, Iterator
+from contextlib import nullcontext
+import argparse
+import copy
+import os
 import sys
+from pyart import (Shapes, IntRange, CHUNK_SIZE, FIELDS, ShapeStream, ShapeDraws, PyArtConfig, gen_int, gen_float, input_ranges, root_entropy, read_pair, check_range,
+                   read_config, add_range_arguments, range_overrides, OutputSink)
+from instrument import Metrics
 
 # @author Anthea Blais
 
-class Shapes(Enum):
-    """ Enumerator shapes class"""
-    CIRCLE = 0
-    RECTANGLE = 1
-    ELLIPSE = 2
-    
-class FloatRange(NamedTuple):
-    """class for the float ranges"""
-    fmin: float
-    fmax: float
-
-class IntRange(NamedTuple):
-    """class for the integer ranges"""
-    imin: int
-    imax: int
-
-class Colours(NamedTuple):
-    """Class for the different colours"""
-    red: IntRange
-    green: IntRange
-    blue: IntRange
-    opacity: FloatRange
-
-# STATIC FUNCTIONS
-def gen_int(r: IntRange) -> int:
-    """Generates a random integer"""
-    return rd.randint(r.imin, r.imax)
-
-def gen_float(r: FloatRange) -> float:
-    """Generates a random float"""
-    return round(rd.uniform(r.fmin,r.fmax),2) #rounds to 2 decimal spaces
-
-
-class PyArtConfig:
-    """ sets the configurations for shapes to be displayed"""
-    counter: int = 1 #counts the number of shapes created
-    
-    def __init__(self, viewport: IntRange, rad: IntRange, rx: IntRange, ry: IntRange, width: IntRange, height: IntRange, red: Colours.red, green: Colours.green, blue: Colours.blue, opacity: Colours.opacity) -> None:
-        """ Initiates the class and sets configurations 
-                parameters:
-                    viewport - Intrange, window range the shapes can be within
-                    rad - IntRange, determines radius of circle
-                    rx - IntRange, determines rx in ellipse 
-                    ry - IntRange, determines ry in ellipse
-                    width - IntRange, determines width of rectangle 
-                    height - IntRange, determines height of rectangle
-                    red - (Colours.red) IntRange, determines red rgb number
-                    green - (Colours.green) IntRange, determines green rgb number
-                    blue - (Colours.blue) IntRange, determines blue rgb number
-                    opacity - (Colours.opacity) Intrange, determines the opactiy
-    
-        """
-        self.viewport = viewport
-        self.rad = rad
-        self.rx = rx
-        self.ry = ry
-        self.width = width
-        self.height = height
-        self.red = red
-        self.green = green
-        self.blue = blue
-        self.opacity = opacity
-        PyArtConfig.counter +=1
-
-    @classmethod
-    def get_count(cls) -> int:
-        """ returns the number of instances created from this class"""
-        return cls.counter
-    
-    @classmethod
-    def from_input(cls, viewport: IntRange) -> any:
-        """ Modifies and returns the class based on the user input. Creates the configurations used for shape constraints."""
-        viewport: IntRange = viewport
-
-        rad_min: int = int(input('radius Min:'))
-        rad_max: int = int(input('radius Max:'))
-        radius = IntRange(imin=rad_min, imax=rad_max)
+SMALL_RENDER: int = 5_000 #up to this many shapes, generating them one SvgCanvas at a time takes less time than loading NumPy
 
-        ellp_min: int = int(input('ellipse min:'))
-        ellp_max: int = int(input('ellipse max:'))
-        rxy: IntRange = IntRange(imin=ellp_min,imax=ellp_max)
-
-        width_min: int = int(input('min width:'))
-        width_max: int = int(input('max width:'))
-        width: IntRange = IntRange(imin= width_min,imax=width_max)
-
-        height_min: int = int(input('min height:'))
-        height_max: int = int(input('max height:'))
-        height: IntRange = IntRange(imin=height_min,imax=height_max)
-
-        red_min: int = int(input('min red:'))
-        red_max: int = int(input('max red:'))
-        red: IntRange = IntRange(imin=red_min,imax=red_max)
-
-        green_min: int = int(input('min green:'))
-        green_max: int = int(input('max green:'))
-        green: IntRange = IntRange(imin=green_min,imax=green_max)
-
-        blue_min: int = int(input('min blue:'))
-        blue_max: int = int(input('max blue:'))
-        blue: IntRange = IntRange(imin=blue_min,imax=blue_max)
-
-        opacity_min: float = float(input('min opacity:'))
-        opacity_max: float = float(input('max opacity:'))
-        opacity: FloatRange = FloatRange(fmin=opacity_min,fmax=opacity_max)
-
-        #modifies the class so that it has the new user defined constraints
-        return cls(viewport = viewport, rad = radius, rx = rxy, ry = rxy, width = width, height = height, red = red, green = green, blue = blue, opacity = opacity)
-        
 class CircleShape: 
     """ Class to create a circle"""
+    __slots__ = ('x', 'y', 'rad', 'red', 'green', 'blue', 'opacity', 'shape_name')
+    rx = ry = width = height = None #fields a circle does not have, shared by every instance
+
     def __init__(self, config: PyArtConfig, shape_name: Shapes) -> None:
         """ Initalizes the CircleShape class
                 parameters:
@@ -124,17 +25,13 @@ class CircleShape:
         """
 
         #generates the elements needed for a circle based on the previously set constraints
-        self.x = gen_int(config.viewport) 
-        self.y = gen_int(config.viewport)
-        self.rad = gen_int(config.rad)
-        self.rx = None
-        self.ry = None
-        self.width = None
-        self.height = None
-        self.red = gen_int(config.red)
-        self.green = gen_int(config.green) 
-        self.blue = gen_int(config.blue)
-        self.opacity = gen_float(config.opacity)
+        self.x = gen_int(config.viewport, config.rng) 
+        self.y = gen_int(config.viewport, config.rng)
+        self.rad = gen_int(config.rad, config.rng)
+        self.red = gen_int(config.red, config.rng)
+        self.green = gen_int(config.green, config.rng) 
+        self.blue = gen_int(config.blue, config.rng)
+        self.opacity = gen_float(config.opacity, config.rng)
         self.shape_name = shape_name.name
         
     def __str__(self) -> str:
@@ -145,8 +42,12 @@ class CircleShape:
         """ Returns the formatted string of CircleShape instance that will put into the html file """
         return (f'<circle cx="{self.x}" cy="{self.y}" r="{self.rad}" fill="rgb({self.red},{self.green},{self.blue})" fill-opacity="{self.opacity}"></circle>')
 
+
 class RectangleShape:
     """ Class to create a rectangle"""
+    __slots__ = ('x', 'y', 'width', 'height', 'red', 'green', 'blue', 'opacity', 'shape_name')
+    rad = rx = ry = None #fields a rectangle does not have, shared by every instance
+
     def __init__(self, config: PyArtConfig, shape_name: Shapes) -> None:
         """ Initalizes the RectangleShape class
                 parameters:
@@ -154,17 +55,14 @@ class RectangleShape:
                     shape_name - Shapes, type of shape
         """
         #generates the elements needed for a Rectangle based on the previously set constraints
-        self.x = gen_int(config.viewport)
-        self.y = gen_int(config.viewport)
-        self.rad = None
-        self.rx = None
-        self.ry = None
-        self.width = gen_int(config.width)
-        self.height = gen_int(config.height)
-        self.red = gen_int(config.red)
-        self.green = gen_int(config.green)
-        self.blue = gen_int(config.blue)
-        self.opacity = gen_float(config.opacity)
+        self.x = gen_int(config.viewport, config.rng)
+        self.y = gen_int(config.viewport, config.rng)
+        self.width = gen_int(config.width, config.rng)
+        self.height = gen_int(config.height, config.rng)
+        self.red = gen_int(config.red, config.rng)
+        self.green = gen_int(config.green, config.rng)
+        self.blue = gen_int(config.blue, config.rng)
+        self.opacity = gen_float(config.opacity, config.rng)
         self.shape_name = shape_name.name
     
     def __str__(self) -> str:
@@ -174,9 +72,13 @@ class RectangleShape:
     def write_line(self) -> str:
         """ Returns the formatted string of RectangleShape instance that will put into the html file """
         return (f'<rect x="{self.x}" y="{self.y}" width="{self.width}" height="{self.height}" style="fill:rgb({self.red},{self.green},{self.blue});fill-opacity:{self.opacity}"></rect>')
+
          
 class EllipseShape:
     """ Class to creates a ellipse"""
+    __slots__ = ('x', 'y', 'rx', 'ry', 'red', 'green', 'blue', 'opacity', 'shape_name')
+    rad = width = height = None #fields an ellipse does not have, shared by every instance
+
     def __init__(self, config: PyArtConfig, shape_name: Shapes) -> None:
         """ Initalizes the EllipseShape class
                 parameters:
@@ -184,17 +86,14 @@ class EllipseShape:
                     shape_name - Shapes, type of shape
         """
         #generates the elements needed for a Ellipse based on the previously set constraints
-        self.x = gen_int(config.viewport)
-        self.y = gen_int(config.viewport)
-        self.rad = None
-        self.rx = gen_int(config.rx)
-        self.ry = gen_int(config.ry)
-        self.width = None
-        self.height = None
-        self.red = gen_int(config.red)
-        self.green = gen_int(config.green)
-        self.blue = gen_int(config.blue)
-        self.opacity = gen_float(config.opacity)
+        self.x = gen_int(config.viewport, config.rng)
+        self.y = gen_int(config.viewport, config.rng)
+        self.rx = gen_int(config.rx, config.rng)
+        self.ry = gen_int(config.ry, config.rng)
+        self.red = gen_int(config.red, config.rng)
+        self.green = gen_int(config.green, config.rng)
+        self.blue = gen_int(config.blue, config.rng)
+        self.opacity = gen_float(config.opacity, config.rng)
         self.shape_name = shape_name.name
 
     def __str__(self) -> str:
@@ -205,23 +104,52 @@ class EllipseShape:
         """ Returns the formatted string of EllipseShape instance that will put into the html file """
         return (f'<ellipse cx="{self.x}" cy="{self.y}" rx="{self.rx}" ry="{self.ry}" style="fill:rgb({self.red},{self.green},{self.blue})"></ellipse>')
 
+
 class HtmlDoc:
     """ Class that writes to the html file"""
     IDENTATION = "  "
-    def __init__(self, file: str,title: str, canvas_width: int, canvas_height: int) -> None:
+    def __init__(self, file: str,title: str, canvas_width: int, canvas_height: int, flush_bytes: int = 0, flush_shapes: int = 0, sink: OutputSink | None = None,
+                 compact: bool = False, compress: tuple[str, ...] = (), append: bool = False) -> None:
         """ Initalizes the class
                 parameters:
-                    file - str, the name of the file
+                    file - str, the name of the file (ignored when sink is given)
                     title - str, title of the html document
+                    canvas_width - int, width of the svg canvas
+                    canvas_height - int, height of the svg canvas
+                    flush_bytes - int, flush policy of the output sink (see OutputSink)
+                    flush_shapes - int, flush policy of the output sink (see OutputSink)
+                    sink - OutputSink, an already open sink to write to instead of file (e.g. one wrapping sys.stdout)
+                    compact - bool, writes the document without indentation or optional spaces (shapes are written compact by serialize.format_compact)
+                    compress - tuple, the precompressed copies of the file to also write (see OutputSink)
+                    append - bool, keeps the document already in file and writes after its last shape instead of starting a new one (see find_trailer)
         """
         self.title = title
         self.__file_name = file
-        self.__file: IO = open(self.__file_name,'w')
         self.__indents: int = 0
+        self.compact = compact
         self.canvas_width = canvas_width
         self.canvas_height = canvas_height
+        self.chunks: int = 0 #chunk indices already used by the document, so appended shapes use new ones
+        if append:
+            #the header is already in the file, writing resumes where its trailer starts
+            offset, self.chunks = find_trailer(file)
+            self.__sink: OutputSink = OutputSink(self.__file_name, flush_bytes=flush_bytes, flush_shapes=flush_shapes, compress=compress, offset=offset)
+            self.__indents = 1
+            return
+        self.__sink = OutputSink(self.__file_name, 'w', flush_bytes=flush_bytes, flush_shapes=flush_shapes, compress=compress) if sink is None else sink
         self.write_header()
 
+    def __enter__(self) -> "HtmlDoc":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def sink(self) -> OutputSink:
+        """ returns the output sink shared with every SvgCanvas of this document"""
+        return self.__sink
+
     def increase_indent(self) -> None:
         """ increases the indent inside of the html file"""
         self.__indents += 1
@@ -232,10 +160,8 @@ class HtmlDoc:
 
     def append(self, content: str) -> None:
         """ appends together the formatted string and the associated number of tabs to be output into html file"""
-        self.__file = open(self.__file_name,'a')
-        tabs: str = HtmlDoc.IDENTATION * self.__indents
-        self.__file.write(f'{tabs}{content}\n')
-        self.__file.flush()
+        tabs: str = '' if self.compact else HtmlDoc.IDENTATION * self.__indents
+        self.__sink.write(f'{tabs}{content}\n')
 
     def write_header(self) -> None:
         """ writes the beggining of the html file"""
@@ -247,7 +173,10 @@ class HtmlDoc:
         self.append('</head>')
         self.append('<body>')
         self.increase_indent()
-        self.append(f'<svg width = "{self.canvas_width}" height="{self.canvas_height}">')
+        if self.compact:
+            self.append(f'<svg width="{self.canvas_width}" height="{self.canvas_height}">')
+        else:
+            self.append(f'<svg width = "{self.canvas_width}" height="{self.canvas_height}">')
 
     def end_body(self) -> None:
         """ writes the end of the html file. """
@@ -256,6 +185,35 @@ class HtmlDoc:
         self.append('</body>')
         self.append('</html>')
 
+    def close(self) -> None:
+        """ flushes and closes the html file"""
+        self.__sink.close()
+
+def find_trailer(file: str) -> tuple[int, int]:
+    """ Finds where the trailer of an html document starts by searching the end of the document
+            parameters:
+                file - str, the name of the html file
+            returns:
+                tuple, (offset, first_index) the byte offset of the line with </svg> and the first chunk index the appended shapes use,
+                which is the byte offset again: the chunks a document used are not recorded, but every chunk that wrote a shape wrote more than one byte
+                before the trailer (and reusing a chunk that wrote nothing repeats nothing), so no index from offset on was used
+            raises:
+                ValueError, if the file cannot be read or holds no </svg>
+    """
+    #the trailer is a few short lines, so only the end of the file is read
+    try:
+        with open(file, 'rb') as html:
+            start: int = max(0, html.seek(0, os.SEEK_END) - 4096)
+            html.seek(start)
+            tail: bytes = html.read()
+    except OSError as error:
+        raise ValueError(f'append: cannot read {file} ({error.strerror})') from None
+    end: int = tail.rfind(b'</svg>')
+    if end < 0:
+        raise ValueError(f'{file}: no </svg> to append before')
+    offset: int = start + tail.rfind(b'\n', 0, end) + 1
+    return offset, offset
+
 class RandomShape:
     """ Class that determines what shape will randomly be outputted into the html file."""
     def __init__(self, config: PyArtConfig, shape: Shapes) -> None:
@@ -284,29 +242,30 @@ class RandomShape:
 class SvgCanvas:
     """ Class that writes svg related elements into html file """
     IDENTATION = "  "
-    def __init__(self,file: IO, config: PyArtConfig, shape: Shapes, indents: int) -> None:
+    def __init__(self,sink: OutputSink, config: PyArtConfig, shape: Shapes, indents: int) -> None:
         """ Initalizes the class
                 parameters:
-                    file - IO, the html file
+                    sink - OutputSink, the shared output of the html file (HtmlDoc.sink)
                     config - PyArtConfig, the configurations for the shape
                     shape - Shapes,n the type of shape 
                     indents - int, the number of indents used for a line
         """
-        self.__file_name = file
+        self.__sink = sink
         self.__indents = indents
 
         #the actual shape instance 
         self.__shape_instance = RandomShape(config,shape).get_shape() 
 
-    def append(self, content: str) -> None:
+    def append(self, content: str, shapes: int = 0) -> int:
         """ appends together the formatted string and the associated number of tabs to be output into html file
                 parameters
                     content - str, the string which contains all formatted shape elements to write to file
+                    shapes - int, the number of shapes in content (used by the flush policy)
+                returns - int, the number of characters written
         """
-        self.__file: IO = open(self.__file_name, 'a')
-        tabs: str = SvgCanvas.IDENTATION * self.__indents
-        self.__file.write(f'{tabs}{content}\n')
-        self.__file.flush()
+        line: str = f'{SvgCanvas.IDENTATION * self.__indents}{content}\n'
+        self.__sink.write(line, shapes)
+        return len(line)
     
     def increase_indent(self) -> None:
         """ increases the indent inside of the html file"""
@@ -316,42 +275,287 @@ class SvgCanvas:
         """ decreases the indent inside of the html file"""
         self.__indents -= 1
 
-    def mid_body(self) -> None:
-        """ writes the actual shape into the html file"""
+    def mid_body(self) -> int:
+        """ writes the actual shape into the html file, returns the number of characters written"""
         self.increase_indent()
         self.increase_indent()
-        self.append(self.__shape_instance.write_line())
+        return self.append(self.__shape_instance.write_line(), shapes=1)
         
+class RenderJob(NamedTuple):
+    """class for everything needed to render one html document"""
+    file: str
+    title: str
+    canvas_width: int
+    canvas_height: int
+    num_shapes: int
+    shape_type: IntRange
+    config: PyArtConfig
+    seed: int | None = None
+    raster: str | None = None
+    raster_scale: float = 1.0
+    tile_size: int = 0
+    cull: bool = False
+    prune: bool = False
+    compact: bool = False
+    compress: tuple[str, ...] = ()
+    scene: str | None = None
+    from_scene: str | None = None
+    append: bool = False #the appended chunks are numbered from the byte offset of the old trailer, so their shapes and css classes are new (see find_trailer)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RenderJob":
+        """ Returns the job described by data
+                parameters:
+                    data - dict, with num_shapes, canvas_width and canvas_height, and optionally file, title, seed, shape_type ([min, max]),
+                           raster (a .png/.jpg image of the canvas to also write), raster_scale, tile_size (paints the image in tiles this many pixels wide),
+                           cull (leaves out the shapes that land entirely outside the canvas), prune (leaves out the shapes hidden under later opaque ones),
+                           compact (writes the shortest html that draws the same picture), compress (a list of precompressed copies to write, gzip and/or br),
+                           scene (a scene file to also write the generated shapes to), from_scene (a scene file to render instead of generating shapes,
+                           which also gives num_shapes and the default canvas), append (adds the shapes to the document already in file)
+                           and the shape constraints of PyArtConfig.from_dict
+                raises:
+                    ValueError, if a value is missing or out of range
+        """
+        if data.get('from_scene'):
+            from scene import Scene
+            scene = Scene(data['from_scene'])
+            data = {'canvas_width': scene.canvas_width, 'canvas_height': scene.canvas_height} | data | {'num_shapes': len(scene)}
+        for key in ('num_shapes', 'canvas_width', 'canvas_height'):
+            if data.get(key) is None:
+                raise ValueError(f'{key} is required')
+        num_shapes: int = read_number(data, 'num_shapes')
+        canvas_width: int = read_number(data, 'canvas_width')
+        canvas_height: int = read_number(data, 'canvas_height')
+        if num_shapes < 0 or canvas_width <= 0 or canvas_height <= 0:
+            raise ValueError('num_shapes must not be negative and the canvas must not be empty')
+        shape_type: IntRange = check_range('shape_type', IntRange(*read_pair('shape_type', data.get('shape_type', (0, 2)), int)))
+        if shape_type.imin < Shapes.CIRCLE.value or shape_type.imax > Shapes.ELLIPSE.value:
+            raise ValueError(f'shape_type: must be within {Shapes.CIRCLE.value} and {Shapes.ELLIPSE.value}')
+        seed: int | None = None if data.get('seed') is None else read_number(data, 'seed')
+        compress = data.get('compress', ())
+        if not isinstance(compress, (list, tuple)) or not all(isinstance(codec, str) and codec in OutputSink.COMPRESSIONS for codec in compress):
+            raise ValueError(f'compress: must be a list of {", ".join(OutputSink.COMPRESSIONS)}')
+        compress = tuple(compress)
+        if data.get('append') and (data.get('raster') or compress):
+            raise ValueError('append: an image or compressed copy would only hold the appended shapes')
+        raster_scale: float = read_number(data, 'raster_scale', 1.0, float)
+        tile_size: int = read_number(data, 'tile_size', 0)
+        if raster_scale <= 0 or tile_size < 0:
+            raise ValueError('raster_scale must be greater than 0 and tile_size must not be negative')
+        viewport: IntRange = IntRange(0,max(canvas_width,canvas_height))
+        return cls(file = data.get('file', 'part3.html'), title = data.get('title', 'My Art Part 3!!'), canvas_width = canvas_width, canvas_height = canvas_height,
+                   num_shapes = num_shapes, shape_type = shape_type, config = PyArtConfig.from_dict(data, viewport), seed = seed,
+                   raster = data.get('raster'), raster_scale = raster_scale, tile_size = tile_size, cull = bool(data.get('cull', False)),
+                   prune = bool(data.get('prune', False)), compact = bool(data.get('compact', False)), compress = compress,
+                   scene = data.get('scene'), from_scene = data.get('from_scene'), append = bool(data.get('append', False)))
+
+def read_number(data: dict, key: str, default: int | float | None = None, kind: type = int) -> int | float:
+    """ Returns data[key] (or default when it is missing) as a number of kind, raises ValueError naming key if it is not a number"""
+    value = data.get(key, default)
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{key}: expected a number, got {value!r}') from None
+
+def load_jobs(path: str) -> list[RenderJob]:
+    """ Reads a list of jobs from a JSON file (a list, or an object with a "jobs" list) or a TOML file ([[jobs]] tables)"""
+    data = read_config(path)
+    entries: list = data['jobs'] if isinstance(data, dict) else data
+    return [RenderJob.from_dict(entry) for entry in entries]
+
+def is_small(job: RenderJob) -> bool:
+    """ returns whether a job is generated and written in pure Python, which for a few shapes is quicker than loading NumPy
+    (culling, pruning, scenes, images and the shared css classes of compact html need NumPy)"""
+    return job.num_shapes <= SMALL_RENDER and not (job.cull or job.prune or job.compact or job.scene or job.from_scene or job.raster)
+
+def shape_configs(config: PyArtConfig, count: int, shape_type: IntRange, entropy: int, first_index: int = 0) -> Iterator[tuple[Shapes, PyArtConfig]]:
+    """ Draws the type of every shape of a render in pure Python, with the config its shape class draws the rest of it from
+            parameters:
+                config - PyArtConfig, the constraints for the generated shapes
+                count - int, the number of shapes to generate
+                shape_type - IntRange, range of Shapes values to draw from
+                entropy - int, the root seed of the render (see root_entropy)
+                first_index - int, the index of the first chunk
+            returns:
+                Iterator[tuple[Shapes, PyArtConfig]], the type of every shape and a copy of config whose rng hands out that shape's numbers (see ShapeDraws),
+                so its shape class makes the shape pyart.columns.gen_columns makes (the copy is reused by the next shape of the chunk)
+    """
+    for index, start in enumerate(range(0, count, CHUNK_SIZE), start=first_index):
+        stream: ShapeStream = ShapeStream(entropy, index)
+        chunk: PyArtConfig = copy.copy(config)
+        for first in range(0, min(CHUNK_SIZE, count - start) * len(FIELDS), len(FIELDS)):
+            shape: int = stream.integer(first, shape_type)
+            chunk.rng = ShapeDraws(stream, first, shape)
+            yield Shapes(shape), chunk
+
+def write_small(job: RenderJob, sink: OutputSink, entropy: int, first_index: int = 0, metrics: Metrics | None = None) -> int:
+    """ Generates and writes the shapes of a small job one SvgCanvas at a time, the same shapes and lines the NumPy pipeline writes for it
+            parameters:
+                job - RenderJob, the document to render
+                sink - OutputSink, where the lines are written
+                entropy - int, the root seed of the render (see root_entropy)
+                first_index - int, the index of the first chunk, so shapes appended to a document do not repeat the ones already on it
+                metrics - Metrics, times the generate and write stages and counts what was written
+            returns:
+                int, the number of shapes written
+    """
+    with metrics.stage('generate') if metrics else nullcontext():
+        canvases: list[SvgCanvas] = [SvgCanvas(sink=sink, config=config, shape=shape, indents=0)
+                                     for shape, config in shape_configs(job.config, job.num_shapes, job.shape_type, entropy, first_index)]
+    with metrics.stage('write') if metrics else nullcontext():
+        written: int = sum(canvas.mid_body() for canvas in canvases)
+    if metrics is not None:
+        metrics.count('bytes', written)
+        metrics.count('chunks', -(-len(canvases) // CHUNK_SIZE))
+        metrics.count('shapes', len(canvases))
+    return len(canvases)
+
+def render(job: RenderJob, workers: int = 1, metrics: Metrics | None = None) -> int:
+    """ Renders one html document
+            parameters:
+                job - RenderJob, the document to render
+                workers - int, the number of processes that generate and serialize shapes
+                metrics - Metrics, collects the time of every stage (generate, format or waiting on the workers, write, scene, raster) and what was written
+            returns:
+                int, the number of shapes written
+    """
+    #one html document owns the only open handle, shapes are generated and written one chunk at a time
+    small: bool = is_small(job)
+    if not small:
+        from pipeline import render_shapes, drain, generate_shapes
+    seed: int = root_entropy(job.seed) #an unseeded job still needs one seed so the raster regenerates the same shapes
+    source: str | None = job.from_scene
+    if job.scene:
+        #the scene is written first and then read back like any other, so the shapes are only generated once
+        from scene import write_scene
+        first_index: int = find_trailer(job.file)[1] if job.append else 0
+        chunks = generate_shapes(job.config, job.num_shapes, job.shape_type, seed=seed, first_index=first_index)
+        with metrics.stage('scene') if metrics else nullcontext():
+            write_scene(job.scene, chunks if metrics is None else metrics.timed(chunks, 'generate'), job.num_shapes, job.canvas_width, job.canvas_height)
+        source = job.scene
+
+    with HtmlDoc(file=job.file, title=job.title,canvas_width=job.canvas_width, canvas_height=job.canvas_height, compact=job.compact, compress=job.compress, append=job.append) as doc:
+        viewport: tuple[int, int] | None = (job.canvas_width, job.canvas_height) if job.cull else None
+        first_index: int = doc.chunks #appended chunks draw from new random streams and name new css classes
+        if small:
+            shapes: int = write_small(job, doc.sink, seed, first_index, metrics)
+        else:
+            if source:
+                from scene import render_scene
+                fragments = render_scene(source, workers, indents=0 if job.compact else 2, viewport=viewport, pruned=job.prune, compact=job.compact, first_index=first_index,
+                                         metrics=metrics)
+            else:
+                fragments = render_shapes(job.config, job.num_shapes, job.shape_type, workers=workers, seed=seed,
+                                          indents=0 if job.compact else 2, viewport=viewport, pruned=job.prune, compact=job.compact, first_index=first_index, metrics=metrics)
+            if metrics is not None:
+                #with worker processes the chunks are made elsewhere, and this process only waits for them
+                fragments = metrics.timed(fragments, 'format' if workers <= 1 or job.prune else 'workers')
+            shapes = drain(fragments, doc.sink, metrics)  #writes the middle of the html doc
+        doc.chunks = first_index + -(-job.num_shapes // CHUNK_SIZE)
+        doc.end_body()  #writes the end of the html doc
+
+    if job.raster:
+        from raster import rasterize, render_tiled, save_image
+        if source:
+            from scene import Scene
+            chunks = Scene(source).chunks()
+        else:
+            chunks = generate_shapes(job.config, job.num_shapes, job.shape_type, seed=seed)
+        with metrics.stage('raster') if metrics else nullcontext():
+            if job.tile_size:
+                render_tiled(chunks, job.canvas_width, job.canvas_height, job.raster, job.raster_scale, job.tile_size, workers)
+            else:
+                save_image(rasterize(chunks, job.canvas_width, job.canvas_height, job.raster_scale), job.raster)
+    if metrics is not None:
+        metrics.count('documents')
+        metrics.count('dropped_shapes', job.num_shapes - shapes) #left out by culling or pruning
+    return shapes
+
 def main() -> None:
     """main method"""
+    parser = argparse.ArgumentParser(description="Generates random svg art into part3.html, asking for every value unless --config, --batch, --shapes or --from-scene is given")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes that generate and serialize shapes")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the random shapes, the same seed gives byte-identical html")
+    parser.add_argument("--config", help="JSON or TOML file describing the document (see RenderJob.from_dict)")
+    parser.add_argument("--batch", help="JSON or TOML file with a list of documents to render one after the other")
+    parser.add_argument("--output", help="name of the html file")
+    parser.add_argument("--title", help="title of the html document")
+    parser.add_argument("--shapes", type=int, help="number of shapes to generate")
+    parser.add_argument("--shape-type", nargs=2, type=int, metavar=('MIN', 'MAX'), help="range of shape types to generate")
+    parser.add_argument("--canvas", nargs=2, type=int, metavar=('WIDTH', 'HEIGHT'), help="size of the svg canvas")
+    parser.add_argument("--raster", help="also renders the canvas into this .png (or .jpg, with Pillow) image, without a browser")
+    parser.add_argument("--raster-scale", type=float, help="pixels per svg unit of the image, below 1 gives a thumbnail")
+    parser.add_argument("--tile-size", type=int, help="paints the image in tiles of this many pixels into a memory-mapped file, for canvases too big for one framebuffer")
+    parser.add_argument("--cull", action='store_true', default=None, help="leaves out the shapes that land entirely outside the canvas")
+    parser.add_argument("--prune", action='store_true', default=None, help="leaves out the shapes completely hidden under later opaque shapes")
+    parser.add_argument("--compact", action='store_true', default=None, help="writes the shortest html that draws the same picture (hex colours, shared css classes, no default attributes)")
+    parser.add_argument("--compress", nargs='+', choices=list(OutputSink.COMPRESSIONS), help="also writes precompressed copies of the html file (.html.gz, .html.br)")
+    parser.add_argument("--scene", help="also writes the generated shapes to this binary scene file, which --from-scene renders again without regenerating them")
+    parser.add_argument("--from-scene", help="renders the shapes of a scene file written by --scene instead of generating new ones")
+    parser.add_argument("--append", action='store_true', default=None, help="adds the shapes to the end of the html file already there instead of rewriting it")
+    parser.add_argument("--cache", metavar='DIR', help="keeps every seeded document in this directory and copies it from there when the same job is rendered again")
+    parser.add_argument("--metrics", action='append', metavar='FILE', help="writes the time of every stage and the shape and byte counts of the run into FILE, as Prometheus text if it ends in .prom and JSON otherwise (can be repeated)")
+    parser.add_argument("--profile", action='store_true', help="also runs cProfile over the run (this process only) and adds its hot spots to the --metrics report")
+    parser.add_argument("--trace-memory", action='store_true', help="also runs tracemalloc over the run and adds the peak and the lines that allocated the most to the --metrics report")
+    add_range_arguments(parser)
+    args = parser.parse_args()
+    if (args.profile or args.trace_memory) and not args.metrics:
+        parser.error("--profile and --trace-memory report through --metrics FILE")
+    if args.workers < 1:
+        parser.error(f"--workers: {args.workers} must be at least 1")
+
+    cache = None
+    if args.cache:
+        from cache import RenderCache
+        cache = RenderCache(args.cache)
+    metrics: Metrics | None = Metrics(args.profile, args.trace_memory) if args.metrics else None
+
+    def run(job: RenderJob, workers: int) -> int:
+        """ renders job (through the cache, if given), and rewrites the --metrics reports with the totals of every job so far"""
+        with metrics or nullcontext():
+            shapes: int = cache.render(job, workers, metrics) if cache else render(job, workers, metrics)
+        if cache:
+            stats = cache.stats()
+            print(f'cache: {stats.hits} hits, {stats.misses} misses, {stats.bypassed} bypassed, {stats.entries} entries, {stats.bytes} bytes', file=sys.stderr)
+        for path in args.metrics or ():
+            metrics.write(path)
+        return shapes
+
+    try:
+        #renders every document of the batch in this one process
+        if args.batch:
+            for job in load_jobs(args.batch):
+                run(job, args.workers)
+            return
+
+        #the config file is overridden by any flag given on the command line
+        data: dict = read_config(args.config) if args.config else {}
+        data.update(range_overrides(args))
+        flags = {'file': args.output, 'title': args.title, 'num_shapes': args.shapes, 'shape_type': args.shape_type, 'seed': args.seed,
+                 'raster': args.raster, 'raster_scale': args.raster_scale, 'tile_size': args.tile_size, 'cull': args.cull, 'prune': args.prune, 'compact': args.compact, 'compress': args.compress, 'scene': args.scene, 'from_scene': args.from_scene, 'append': args.append,
+                 'canvas_width': args.canvas and args.canvas[0], 'canvas_height': args.canvas and args.canvas[1]}
+        data.update({key: value for key, value in flags.items() if value is not None})
+        if 'num_shapes' in data or data.get('from_scene'):
+            run(RenderJob.from_dict(data), args.workers)
+            return
+    except ValueError as error:
+        parser.error(str(error))
 
     #gets user input for number of shapes, what types of shapes user wants to generate
-    num_shapes: int = int(input("Number of shapes to generate: "))
-    shape_type_min: int = int(input("min number for shape type:"))
-    shape_type_max: int = int(input("max number for shape type:"))
+    data.update({'num_shapes': input("Number of shapes to generate: "), 'shape_type': (input("min number for shape type:"), input("max number for shape type:"))})
 
     #gets user input for how big the svg width and height will be 
-    canvas_width: int = int(input("Canvas width:"))
-    canvas_height: int = int(input("Canvas height:"))
-    viewport: IntRange = IntRange(0,max(canvas_width,canvas_height))
-    
-    #sets the initial configurations/ constraints set by the user input
-    user_input: PyArtConfig = PyArtConfig.from_input(viewport)
-
-    with open('part3.html', 'a') as sys.stdout:
-        doc: HtmlDoc = HtmlDoc(file="part3.html", title="My Art Part 3!!",canvas_width=canvas_width, canvas_height=canvas_height)
-        while(PyArtConfig.get_count() <= num_shapes + 1):
-            range: int = gen_int(IntRange(shape_type_min,shape_type_max)) #generates specified shapes
-            #generates shapes within the user specified range
-            configurations: PyArtConfig = PyArtConfig(viewport=viewport, rad=user_input.rad,rx=user_input.rx, ry=user_input.ry, width=user_input.width, height=user_input.height, red=user_input.red, green=user_input.green, blue=user_input.blue, opacity=user_input.opacity)
-            
-            #writes the shape into the html file
-            svg: SvgCanvas = SvgCanvas(file="part3.html",config=configurations,shape=Shapes(range),indents=0)
-            svg.mid_body()  #writes the middle of the html doc
-        doc.end_body()  #writes the end of the html doc
+    data.update({'canvas_width': input("Canvas width:"), 'canvas_height': input("Canvas height:")})
+
+    #sets the initial configurations/ constraints set by the user input, checked like any other job (see RenderJob.from_dict)
+    data.update(input_ranges())
+    try:
+        job: RenderJob = RenderJob.from_dict(data)
+    except ValueError as error:
+        parser.error(str(error))
+    run(job, args.workers)
         
 
-    
 if __name__ == "__main__":
 
     main()
\ No newline at end of file
@@ -0,0 +1,244 @@
+from typing import Callable
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+SIZES: tuple[int, ...] = (1_000, 100_000, 1_000_000)
+BASELINE: str = 'bench_baseline.json'
+RESULTS: str = 'bench_results.json'
+
+#the shape constraints every benchmark generates with
+RANGES: dict = {'num_shapes': 0, 'canvas_width': 1250, 'canvas_height': 550, 'seed': 0, 'rad': (1, 100), 'ellipse': (10, 30),
+                'width': (10, 60), 'height': (10, 60), 'red': (0, 255), 'green': (0, 255), 'blue': (0, 255), 'opacity': (0.0, 1.0)}
+
+# STATIC FUNCTIONS
+def a43_config():
+    """ returns the a43 PyArtConfig the benchmarks generate shapes from"""
+    import a43
+    return a43.PyArtConfig.from_dict(RANGES, a43.IntRange(0, 1250))
+
+def a41_mid_body(size: int) -> Callable[[], tuple[int, int]]:
+    """ a41.SvgCanvas.mid_body, which writes 10 shapes per call"""
+    import a41
+    a41.HtmlDoc(file="part1.html", title="bench")
+    def run() -> tuple[int, int]:
+        for _ in range(size // 10):
+            svg = a41.SvgCanvas(file="part1.html", shape=a41.CircleShape((50,50,50,"rgb(255, 0, 0)",1.0)), shape_type="circle", indents=2)
+            svg.mid_body("circle")
+        return size // 10 * 10, os.path.getsize("part1.html")
+    return run
+
+def a41_pattern(size: int) -> Callable[[], tuple[int, int]]:
+    """ a41.SvgCanvas.mid_body with a pattern, expanding both rows through one Grid"""
+    import a41
+    from pattern import Grid
+    def run() -> tuple[int, int]:
+        doc = a41.HtmlDoc(file="part1.html", title="bench")
+        svg = a41.SvgCanvas(file=doc.file, shape=a41.CircleShape((50,50,50,"rgb(255, 0, 0)",1.0)), shape_type="circle", indents=2, pattern=[Grid(size // 2, 1, 100, 0)])
+        svg.mid_body("circle")
+        doc.file.close()
+        return size // 2 * 2, os.path.getsize("part1.html")
+    return run
+
+def a42_table_elements(size: int) -> Callable[[], tuple[int, int]]:
+    """ a42.write_table, one PyArtConfig, Table and Table.elements call per row"""
+    import a42
+    def run() -> tuple[int, int]:
+        with a42.HtmlDoc(file="part2.html", title="bench") as doc:
+            doc.labels()
+            a42.write_table(doc.sink, size, seed=0)
+        return size, os.path.getsize("part2.html")
+    return run
+
+def a42_table_rows(size: int) -> Callable[[], tuple[int, int]]:
+    """ a42.TableWriter, generating and writing whole chunks of rows"""
+    import a42
+    def run() -> tuple[int, int]:
+        with a42.HtmlDoc(file="part2.html", title="bench") as doc:
+            doc.labels()
+            table = a42.TableWriter(doc.sink)
+            table.generate(size, 1 << 16, seed=0)
+            table.end()
+        return size, os.path.getsize("part2.html")
+    return run
+
+def a43_mid_body(size: int) -> Callable[[], tuple[int, int]]:
+    """ a43.write_small, the per-object generate, format and write path of one SvgCanvas per shape"""
+    import a43
+    job = a43.RenderJob.from_dict(dict(RANGES, num_shapes=size, file="part3.html"))
+    def run() -> tuple[int, int]:
+        with a43.HtmlDoc(file="part3.html", title="bench", canvas_width=1250, canvas_height=550) as doc:
+            a43.write_small(job, doc.sink, 0)
+            doc.end_body()
+        return size, os.path.getsize("part3.html")
+    return run
+
+def a43_generate_objects(size: int) -> Callable[[], tuple[int, int]]:
+    """ a43.RandomShape.get_shape, generating one shape object at a time"""
+    import a43
+    config = a43_config()
+    def run() -> tuple[int, int]:
+        for shape, shape_config in a43.shape_configs(config, size, a43.IntRange(0, 2), 0):
+            a43.RandomShape(shape_config, shape).get_shape()
+        return size, 0
+    return run
+
+def a43_generate_columns(size: int) -> Callable[[], tuple[int, int]]:
+    """ pipeline.generate_shapes, generating NumPy columns one chunk at a time"""
+    from pipeline import generate_shapes
+    config = a43_config()
+    def run() -> tuple[int, int]:
+        return sum(len(chunk) for chunk in generate_shapes(config, size, seed=0)), 0
+    return run
+
+def a43_format_objects(size: int) -> Callable[[], tuple[int, int]]:
+    """ write_line() of already generated a43 shape objects"""
+    import a43
+    config = a43_config()
+    shapes = [a43.RandomShape(shape_config, shape).get_shape() for shape, shape_config in a43.shape_configs(config, size, a43.IntRange(0, 2), 0)]
+    def run() -> tuple[int, int]:
+        return size, sum(len(shape.write_line()) + 1 for shape in shapes)
+    return run
+
+def a43_format_columns(size: int) -> Callable[[], tuple[int, int]]:
+    """ serialize.format_lines of already generated chunks"""
+    from pipeline import generate_shapes
+    from pyart.serialize import format_lines
+    chunks = list(generate_shapes(a43_config(), size, seed=0))
+    def run() -> tuple[int, int]:
+        return size, sum(len(format_lines(chunk)) for chunk in chunks)
+    return run
+
+def a43_format_compact(size: int) -> Callable[[], tuple[int, int]]:
+    """ serialize.format_compact of already generated chunks"""
+    from pipeline import generate_shapes
+    from pyart.serialize import format_compact
+    chunks = list(generate_shapes(a43_config(), size, seed=0))
+    def run() -> tuple[int, int]:
+        return size, sum(len(format_compact(chunk, 0, f'c{index:x}-')) for index, chunk in enumerate(chunks))
+    return run
+
+def a43_write(size: int) -> Callable[[], tuple[int, int]]:
+    """ OutputSink.write of already formatted chunks"""
+    import a43
+    from pipeline import render_shapes
+    fragments = list(render_shapes(a43_config(), size, seed=0))
+    def run() -> tuple[int, int]:
+        with a43.OutputSink("part3.html") as sink:
+            for fragment in fragments:
+                sink.write(fragment.text, fragment.shapes)
+        return size, os.path.getsize("part3.html")
+    return run
+
+def a43_render(size: int) -> Callable[[], tuple[int, int]]:
+    """ a43.render, the whole document end to end"""
+    import a43
+    job = a43.RenderJob.from_dict(dict(RANGES, num_shapes=size, file="part3.html"))
+    def run() -> tuple[int, int]:
+        return a43.render(job), os.path.getsize("part3.html")
+    return run
+
+CASES: dict[str, Callable[[int], Callable[[], tuple[int, int]]]] = {
+    'a41.mid_body': a41_mid_body,
+    'a41.pattern': a41_pattern,
+    'a42.table_elements': a42_table_elements,
+    'a42.table_rows': a42_table_rows,
+    'a43.mid_body': a43_mid_body,
+    'a43.generate_objects': a43_generate_objects,
+    'a43.generate_columns': a43_generate_columns,
+    'a43.format_objects': a43_format_objects,
+    'a43.format_columns': a43_format_columns,
+    'a43.format_compact': a43_format_compact,
+    'a43.write': a43_write,
+    'a43.render': a43_render,
+}
+
+def syscalls() -> int | None:
+    """ returns the number of read and write syscalls this process has made so far (None where /proc is not available)"""
+    try:
+        with open('/proc/self/io') as file:
+            counters: dict = dict(line.split(': ') for line in file.read().splitlines())
+    except OSError:
+        return None
+    return int(counters['syscr']) + int(counters['syscw'])
+
+def measure(name: str, size: int) -> dict:
+    """ Runs one benchmark in a scratch directory that is removed afterwards, the unit of work of the child process each benchmark gets
+            parameters:
+                name - str, the key of the benchmark in CASES
+                size - int, the number of shapes
+            returns:
+                dict, the shapes, bytes, seconds, throughput, peak RSS and syscalls of the run
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    home: str = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='bench-') as scratch:
+        os.chdir(scratch)
+        try:
+            run = CASES[name](size)
+            before: int | None = syscalls()
+            start: float = time.perf_counter()
+            shapes, written = run()
+            seconds: float = time.perf_counter() - start
+            after: int | None = syscalls()
+        finally:
+            os.chdir(home) #the scratch directory, with every file the run wrote, is removed on the way out
+    return {
+        'shapes': shapes,
+        'bytes': written,
+        'seconds': seconds,
+        'shapes_per_second': shapes / seconds if seconds else 0.0,
+        'bytes_per_second': written / seconds if seconds else 0.0,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'syscalls': None if before is None else after - before,
+    }
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """ returns a line for every benchmark whose shapes/s dropped more than tolerance (a fraction) below the baseline"""
+    regressions: list[str] = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old and old['shapes_per_second'] and result['shapes_per_second'] < old['shapes_per_second'] * (1 - tolerance):
+            regressions.append(f'{key}: {result["shapes_per_second"]:,.0f} shapes/s, baseline {old["shapes_per_second"]:,.0f}')
+    return regressions
+
+def main() -> None:
+    """main method"""
+    parser = argparse.ArgumentParser(description="Benchmarks the shape generators of a41, a42 and a43")
+    parser.add_argument("--sizes", nargs='+', type=int, default=SIZES, help="shape counts to run every benchmark at")
+    parser.add_argument("--cases", nargs='+', default=list(CASES), choices=list(CASES), metavar='CASE', help=f"benchmarks to run: {', '.join(CASES)}")
+    parser.add_argument("--output", default=RESULTS, help="JSON file the results are written to")
+    parser.add_argument("--baseline", default=BASELINE, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--save-baseline", action='store_true', help="also write the results to the baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="slowdown against the baseline (as a fraction) that counts as a regression")
+    args = parser.parse_args()
+
+    results: dict = {}
+    for name in args.cases:
+        for size in args.sizes:
+            #every benchmark runs in a fresh process so peak RSS and syscalls are its own
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                result: dict = pool.submit(measure, name, size).result()
+            results[f'{name}[{size}]'] = result
+            print(f'{name:<22} {size:>9}: {result["shapes_per_second"]:>12,.0f} shapes/s {result["bytes_per_second"] / 1e6:>8.1f} MB/s '
+                  f'{result["peak_rss_kb"] / 1024:>8.1f} MB peak {result["syscalls"] if result["syscalls"] is not None else "-":>9} syscalls')
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            regressions: list[str] = compare(results, json.load(file), args.tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}', file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
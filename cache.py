@@ -0,0 +1,182 @@
+from typing import NamedTuple
+from contextlib import nullcontext
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pyart import RANGE_KEYS, OutputSink
+from a43 import RenderJob, render
+from instrument import Metrics
+
+VERSION: int = 3 #bumped whenever the same job would render different bytes, which retires every older entry
+MAX_BYTES: int = 1 << 30
+MAX_ENTRIES: int = 1000
+
+class CacheStats(NamedTuple):
+    """class for the counters of a render cache"""
+    hits: int
+    misses: int
+    bypassed: int
+    evictions: int
+    entries: int
+    bytes: int
+
+# STATIC FUNCTIONS
+def cacheable(job: RenderJob) -> bool:
+    """ returns whether a job always renders the same files, an unseeded job is random and appending or scene files depend on files outside the job"""
+    return job.seed is not None and not job.append and not job.scene and not job.from_scene
+
+def job_key(job: RenderJob) -> str:
+    """ Returns the sha256 of everything about a job that changes the files it renders, but not where they are written or how fast"""
+    config = job.config
+    normal: dict = {
+        'version': VERSION,
+        'title': job.title,
+        'canvas': [job.canvas_width, job.canvas_height],
+        'num_shapes': job.num_shapes,
+        'shape_type': list(job.shape_type),
+        'seed': job.seed,
+        'ranges': {key: list(getattr(config, key)) for key in ('viewport',) + RANGE_KEYS},
+        'cull': job.cull,
+        'prune': job.prune,
+        'compact': job.compact,
+        'compress': sorted(job.compress),
+        'raster': os.path.splitext(job.raster)[1].lower() if job.raster else None,
+        'raster_scale': job.raster_scale if job.raster else None,
+    }
+    return hashlib.sha256(json.dumps(normal, sort_keys=True).encode()).hexdigest()
+
+def outputs(job: RenderJob) -> dict[str, str]:
+    """ Returns every file a job can write, keyed by the name it is kept under in a cache entry"""
+    files: dict[str, str] = {'html': job.file}
+    for codec in job.compress:
+        files['html' + OutputSink.COMPRESSIONS[codec]] = job.file + OutputSink.COMPRESSIONS[codec]
+    if job.raster:
+        files['raster'] = job.raster
+    return files
+
+
+class RenderCache:
+    """ Class for a directory of rendered documents keyed by job_key, evicting the least recently used ones past a size or entry limit"""
+
+    def __init__(self, directory: str, max_bytes: int = MAX_BYTES, max_entries: int = MAX_ENTRIES) -> None:
+        """ Initalizes the class
+                parameters:
+                    directory - str, where the entries are kept (created if missing), one sub directory per job_key
+                    max_bytes - int, the most bytes all entries may take up together
+                    max_entries - int, the most entries kept
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.bypassed: int = 0
+        self.evictions: int = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        """ returns the directory of the entry of key"""
+        return os.path.join(self.directory, key)
+
+    def fetch(self, key: str, job: RenderJob) -> int | None:
+        """ Copies the files of a cached entry to where job writes them
+                parameters:
+                    key - str, the job_key of job
+                    job - RenderJob, the job to copy the files for
+                returns:
+                    int, the number of shapes of the cached document, or None when key is not cached
+        """
+        entry: str = self.path(key)
+        try:
+            with open(os.path.join(entry, 'meta.json')) as file:
+                meta: dict = json.load(file)
+            for name, target in outputs(job).items():
+                if name in meta['files']:
+                    shutil.copyfile(os.path.join(entry, name), target)
+        except (OSError, ValueError, KeyError):
+            return None #missing, evicted while being read or damaged, so the job is rendered again
+        os.utime(os.path.join(entry, 'meta.json')) #marks the entry as just used
+        return meta['shapes']
+
+    def store(self, key: str, job: RenderJob, shapes: int) -> None:
+        """ Keeps copies of the files job just rendered under key, then evicts entries past the limits
+                parameters:
+                    key - str, the job_key of job
+                    job - RenderJob, the job that was rendered
+                    shapes - int, the number of shapes written
+        """
+        #the entry is built aside and renamed into place, so a reader never sees half of it
+        staging: str = tempfile.mkdtemp(prefix='.staging-', dir=self.directory)
+        files: list[str] = []
+        for name, source in outputs(job).items():
+            if os.path.exists(source):
+                shutil.copyfile(source, os.path.join(staging, name))
+                files.append(name)
+        with open(os.path.join(staging, 'meta.json'), 'w') as file:
+            json.dump({'shapes': shapes, 'files': files, 'created': time.time()}, file)
+        try:
+            os.rename(staging, self.path(key))
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True) #another process stored the same key first
+        self.evict()
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        """ returns (last used, bytes, path) of every entry, least recently used first"""
+        found: list[tuple[float, int, str]] = []
+        for entry in os.scandir(self.directory):
+            if entry.is_dir() and not entry.name.startswith('.'):
+                try:
+                    used: float = os.stat(os.path.join(entry.path, 'meta.json')).st_mtime
+                    size: int = sum(file.stat().st_size for file in os.scandir(entry.path))
+                except OSError:
+                    continue
+                found.append((used, size, entry.path))
+        return sorted(found)
+
+    def evict(self) -> None:
+        """ removes the least recently used entries until the cache is within max_bytes and max_entries"""
+        found: list[tuple[float, int, str]] = self.entries()
+        total: int = sum(size for _, size, _ in found)
+        remaining: int = len(found)
+        for _, size, path in found:
+            if total <= self.max_bytes and remaining <= self.max_entries:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            remaining -= 1
+            self.evictions += 1
+
+    def render(self, job: RenderJob, workers: int = 1, metrics: Metrics | None = None) -> int:
+        """ Renders a job, or copies its files from the cache when the same job was rendered before
+                parameters:
+                    job - RenderJob, the document to render
+                    workers - int, the number of processes that generate and serialize shapes on a miss
+                    metrics - Metrics, measures the render on a miss, and times fetching and storing entries as the cache stage
+                returns:
+                    int, the number of shapes written
+        """
+        if not cacheable(job):
+            self.bypassed += 1
+            return render(job, workers, metrics)
+        key: str = job_key(job)
+        with metrics.stage('cache') if metrics else nullcontext():
+            shapes: int | None = self.fetch(key, job)
+        if shapes is not None:
+            self.hits += 1
+            if metrics is not None:
+                metrics.count('cache_hits')
+                metrics.count('shapes', shapes)
+            return shapes
+        self.misses += 1
+        shapes = render(job, workers, metrics)
+        with metrics.stage('cache') if metrics else nullcontext():
+            self.store(key, job, shapes)
+        return shapes
+
+    def stats(self) -> CacheStats:
+        """ returns the counters of this cache object and the entries and bytes now on disk"""
+        found: list[tuple[float, int, str]] = self.entries()
+        return CacheStats(self.hits, self.misses, self.bypassed, self.evictions, len(found), sum(size for _, size, _ in found))
@@ -0,0 +1,148 @@
+from typing import Iterable, Iterator
+from contextlib import contextmanager
+import json
+import time
+
+PREFIX: str = 'pyart' #starts the name of every Prometheus metric
+HOT_SPOTS: int = 20 #functions listed in the report of a profiled run
+
+class Metrics:
+    """ Class that collects the time spent in every stage of a run and counters of what it wrote, with optional cProfile and tracemalloc capture"""
+
+    def __init__(self, profile: bool = False, trace_memory: bool = False) -> None:
+        """ Initalizes the class
+                parameters:
+                    profile - bool, also runs cProfile while the run is measured and reports the functions with the most own time
+                    trace_memory - bool, also runs tracemalloc while the run is measured and reports the peak and the lines that allocated the most
+        """
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.__seconds: dict[str, float] = {}
+        self.__calls: dict[str, int] = {}
+        self.__counters: dict[str, int] = {}
+        self.__nested: list[float] = [] #time spent in stages nested in each open stage, which is taken out of that stage's own time
+        self.__start: float | None = None
+        self.__wall: float = 0.0
+        self.__profiler = None
+        self.__memory: dict | None = None
+
+    def __enter__(self) -> "Metrics":
+        """ starts (or resumes, for the next document of a batch) measuring the run, and the profilers that were asked for"""
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        if self.profile:
+            if self.__profiler is None:
+                import cProfile
+                self.__profiler = cProfile.Profile()
+            self.__profiler.enable()
+        self.__start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """ pauses measuring the run and keeps what tracemalloc found"""
+        self.__wall += time.perf_counter() - self.__start
+        self.__start = None
+        if self.__profiler is not None:
+            self.__profiler.disable()
+        if self.trace_memory:
+            import tracemalloc
+            peak: int = tracemalloc.get_traced_memory()[1]
+            #the lines that allocated the most are kept from the part of the run with the highest peak
+            if self.__memory is None or peak > self.__memory['peak_bytes']:
+                top = tracemalloc.take_snapshot().statistics('lineno')[:HOT_SPOTS]
+                self.__memory = {'peak_bytes': peak, 'top': [{'line': str(stat.traceback[0]), 'bytes': stat.size, 'blocks': stat.count} for stat in top]}
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """ Times the block as one call of a stage, leaving out the time of the stages nested in it
+                parameters:
+                    name - str, the stage (generate, format, write ...)
+        """
+        start: float = time.perf_counter()
+        self.__nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed: float = time.perf_counter() - start
+            self.__seconds[name] = self.__seconds.get(name, 0.0) + elapsed - self.__nested.pop()
+            self.__calls[name] = self.__calls.get(name, 0) + 1
+            if self.__nested:
+                self.__nested[-1] += elapsed
+
+    def timed(self, items: Iterable, name: str) -> Iterator:
+        """ Hands back the items of a lazy iterable, timing the making of every item as one call of a stage (the time the caller spends on it is not counted)"""
+        iterator: Iterator = iter(items)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """ adds amount to a counter (shapes, bytes, chunks ...)"""
+        self.__counters[name] = self.__counters.get(name, 0) + amount
+
+    def report(self) -> dict:
+        """ Returns everything measured so far
+                returns:
+                    dict, the wall seconds, the own seconds, calls and share of the wall time of every stage, the counters, shape and byte throughput
+                    and, when captured, the profiler's hot spots and tracemalloc's peak and top lines
+        """
+        wall: float = self.__wall + (time.perf_counter() - self.__start if self.__start is not None else 0.0)
+        stages: dict = {name: {'seconds': seconds, 'calls': self.__calls[name], 'share': seconds / wall if wall else 0.0}
+                        for name, seconds in sorted(self.__seconds.items(), key=lambda item: -item[1])}
+        report: dict = {
+            'seconds': wall,
+            'stages': stages,
+            'counters': dict(self.__counters),
+            'shapes_per_second': self.__counters.get('shapes', 0) / wall if wall else 0.0,
+            'bytes_per_second': self.__counters.get('bytes', 0) / wall if wall else 0.0,
+        }
+        if self.__profiler is not None:
+            report['hot_spots'] = hot_spots(self.__profiler)
+        if self.__memory is not None:
+            report['memory'] = self.__memory
+        return report
+
+    def prometheus(self) -> str:
+        """ returns the report in the Prometheus text exposition format"""
+        report: dict = self.report()
+        lines: list[str] = [
+            f'# HELP {PREFIX}_run_seconds Wall time of the run.',
+            f'# TYPE {PREFIX}_run_seconds gauge',
+            f'{PREFIX}_run_seconds {report["seconds"]:.6f}',
+            f'# HELP {PREFIX}_stage_seconds_total Time spent in each stage of the run, without the stages nested in it.',
+            f'# TYPE {PREFIX}_stage_seconds_total counter',
+        ]
+        lines += [f'{PREFIX}_stage_seconds_total{{stage="{name}"}} {stage["seconds"]:.6f}' for name, stage in report['stages'].items()]
+        lines += [f'# HELP {PREFIX}_stage_calls_total Times each stage of the run was entered.', f'# TYPE {PREFIX}_stage_calls_total counter']
+        lines += [f'{PREFIX}_stage_calls_total{{stage="{name}"}} {stage["calls"]}' for name, stage in report['stages'].items()]
+        for name, value in sorted(report['counters'].items()):
+            lines += [f'# TYPE {PREFIX}_{name}_total counter', f'{PREFIX}_{name}_total {value}']
+        for name in ('shapes_per_second', 'bytes_per_second'):
+            lines += [f'# TYPE {PREFIX}_{name} gauge', f'{PREFIX}_{name} {report[name]:.3f}']
+        if 'memory' in report:
+            lines += [f'# HELP {PREFIX}_peak_traced_bytes Peak memory traced by tracemalloc.', f'# TYPE {PREFIX}_peak_traced_bytes gauge',
+                      f'{PREFIX}_peak_traced_bytes {report["memory"]["peak_bytes"]}']
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str) -> None:
+        """ writes the report into path, in the Prometheus text format if it ends in .prom and as JSON otherwise"""
+        with open(path, 'w') as file:
+            if path.endswith('.prom'):
+                file.write(self.prometheus())
+            else:
+                json.dump(self.report(), file, indent=2)
+
+# STATIC FUNCTIONS
+def hot_spots(profiler, limit: int = HOT_SPOTS) -> list[dict]:
+    """ returns the limit functions of a cProfile.Profile with the most own time, with their calls, own and cumulative seconds"""
+    import pstats
+    stats: dict = pstats.Stats(profiler).stats
+    top = sorted(stats.items(), key=lambda item: -item[1][2])[:limit]
+    return [{'function': f'{file}:{line}({function})', 'calls': calls, 'seconds': own, 'cumulative': cumulative}
+            for (file, line, function), (_, calls, own, cumulative, _) in top]
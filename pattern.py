@@ -0,0 +1,106 @@
+from typing import NamedTuple
+from functools import reduce
+import numpy as np
+from pyart import Shapes
+from pyart.columns import ShapeColumns
+
+#the write_line() formats of a41's shape classes, which write rgb() with spaces and opacity as given
+A41_TEMPLATES: dict[int, tuple[str, tuple[str, ...]]] = {
+    Shapes.CIRCLE.value: ('<circle cx="{}" cy="{}" r="{}" fill="rgb({}, {}, {})" fill-opacity="{}"></circle>', ('x', 'y', 'rad', 'red', 'green', 'blue', 'opacity')),
+    Shapes.RECTANGLE.value: ('<rect x="{}" y="{}" width="{}" height="{}" style="fill:rgb({}, {}, {});fill-opacity:{}"></rect>', ('x', 'y', 'width', 'height', 'red', 'green', 'blue', 'opacity')),
+    Shapes.ELLIPSE.value: ('<ellipse cx="{}" cy="{}" rx="{}" ry="{}" style="fill:rgb({}, {}, {})"></ellipse>', ('x', 'y', 'rx', 'ry', 'red', 'green', 'blue')),
+}
+
+SIZE_FIELDS: tuple[str, ...] = ('rad', 'rx', 'ry', 'width', 'height')
+COLOUR_FIELDS: tuple[str, ...] = ('red', 'green', 'blue')
+
+# STATIC FUNCTIONS
+def from_fields(shapes: list[dict]) -> ShapeColumns:
+    """ Returns the columns of a few base shapes
+            parameters:
+                shapes - list, one dict of ShapeColumns fields per shape in painter's order, fields a shape does not use may be left out
+            returns:
+                ShapeColumns, integer columns with opacity as floats (1.0 when left out)
+    """
+    columns: dict[str, np.ndarray] = {field: np.array([shape.get(field, 0) for shape in shapes], dtype=np.int64) for field in ShapeColumns._fields if field != 'opacity'}
+    columns['opacity'] = np.array([float(shape.get('opacity', 1.0)) for shape in shapes], dtype=np.float64)
+    return ShapeColumns(**columns)
+
+def repeat(columns: ShapeColumns, count: int) -> tuple[ShapeColumns, np.ndarray]:
+    """ Returns every shape repeated count times in a row, and the number (0 up to count - 1) of every copy"""
+    if count < 1:
+        raise ValueError(f'count: {count} must be at least 1')
+    copies: ShapeColumns = ShapeColumns(*(np.repeat(column, count) for column in columns))
+    return copies, np.tile(np.arange(count), len(columns))
+
+def with_fields(columns: ShapeColumns, fields: dict[str, np.ndarray]) -> ShapeColumns:
+    """ returns columns with the given fields replaced, each cast back to the dtype of the field it replaces"""
+    replaced: dict[str, np.ndarray] = columns._asdict() #not _replace(), which counts fields with the __len__ of the batch
+    for name, value in fields.items():
+        replaced[name] = value if replaced[name].dtype.kind == 'f' else np.rint(value).astype(replaced[name].dtype)
+    return ShapeColumns(**replaced)
+
+
+class Grid(NamedTuple):
+    """ class for a transform that copies every shape across a grid, left to right then top to bottom"""
+    columns: int
+    rows: int = 1
+    step_x: int = 0
+    step_y: int = 0
+
+    def apply(self, shapes: ShapeColumns) -> ShapeColumns:
+        """ returns columns * rows copies of every shape, each moved to its place in the grid"""
+        copies, number = repeat(shapes, self.columns * self.rows)
+        return with_fields(copies, {'x': copies.x + number % self.columns * self.step_x, 'y': copies.y + number // self.columns * self.step_y})
+
+
+class Radial(NamedTuple):
+    """ class for a transform that copies every shape in even steps around a centre"""
+    count: int
+    centre_x: int
+    centre_y: int
+
+    def apply(self, shapes: ShapeColumns) -> ShapeColumns:
+        """ returns count copies of every shape, copy k turned k / count of a full turn around the centre"""
+        copies, number = repeat(shapes, self.count)
+        angle = 2 * np.pi * number / self.count
+        x, y = copies.x - self.centre_x, copies.y - self.centre_y
+        return with_fields(copies, {'x': self.centre_x + x * np.cos(angle) - y * np.sin(angle), 'y': self.centre_y + x * np.sin(angle) + y * np.cos(angle)})
+
+
+class Scale(NamedTuple):
+    """ class for a transform that copies every shape with its size ramping from one factor to another"""
+    count: int
+    first: float
+    last: float
+
+    def apply(self, shapes: ShapeColumns) -> ShapeColumns:
+        """ returns count copies of every shape, the first scaled by first, the last by last and the rest evenly in between"""
+        copies, number = repeat(shapes, self.count)
+        factor = np.linspace(self.first, self.last, self.count)[number]
+        return with_fields(copies, {field: getattr(copies, field) * factor for field in SIZE_FIELDS})
+
+
+class Fade(NamedTuple):
+    """ class for a transform that copies every shape with its colour ramping towards another colour"""
+    count: int
+    red: int
+    green: int
+    blue: int
+
+    def apply(self, shapes: ShapeColumns) -> ShapeColumns:
+        """ returns count copies of every shape, the first in its own colour, the last in this one and the rest evenly in between"""
+        copies, number = repeat(shapes, self.count)
+        share = np.linspace(0.0, 1.0, self.count)[number]
+        return with_fields(copies, {field: getattr(copies, field) + (getattr(self, field) - getattr(copies, field)) * share for field in COLOUR_FIELDS})
+
+
+def expand(shapes: ShapeColumns, transforms: list[Grid | Radial | Scale | Fade]) -> ShapeColumns:
+    """ Expands base shapes through a chain of transforms into the whole table of instances at once
+            parameters:
+                shapes - ShapeColumns, the base shapes
+                transforms - list, applied in order, each one expanding every instance the one before it made
+            returns:
+                ShapeColumns, the copies of each base shape (and of each copy) kept together in painter's order
+    """
+    return reduce(lambda instances, transform: transform.apply(instances), transforms, shapes)
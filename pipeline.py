@@ -0,0 +1,152 @@
+from typing import NamedTuple, Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor, Future
+from collections import deque
+from pyart import CHUNK_SIZE, IntRange, OutputSink, PyArtConfig, ShapeStream, root_entropy
+from pyart.columns import ShapeColumns, gen_columns
+from pyart.serialize import format_lines, format_compact
+from spatial import in_viewport, occluded
+from instrument import Metrics
+
+class Fragment(NamedTuple):
+    """class for a serialized chunk of shapes"""
+    text: str
+    shapes: int
+
+# STATIC FUNCTIONS
+def generate_shapes(config: PyArtConfig, count: int, shape_type: IntRange = IntRange(0, 2), chunk_size: int = CHUNK_SIZE, seed: int | None = None,
+                    first_index: int = 0) -> Iterator[ShapeColumns]:
+    """ Lazily generates count shapes, at most chunk_size at a time
+            parameters:
+                config - PyArtConfig, the constraints for the generated shapes
+                count - int, the total number of shapes
+                shape_type - IntRange, range of Shapes values to draw from
+                chunk_size - int, the largest number of shapes in one chunk
+                seed - int, the seed of the render (unseeded if None), chunk i always draws from ShapeStream(seed, i)
+                first_index - int, the index of the first chunk, so shapes appended to a document do not repeat the ones already on it
+    """
+    entropy: int = root_entropy(seed)
+    for index, start in enumerate(range(0, count, chunk_size), start=first_index):
+        yield gen_columns(config, min(chunk_size, count - start), shape_type, ShapeStream(entropy, index))
+
+def cull(chunk: ShapeColumns, viewport: tuple[int, int] | None) -> ShapeColumns:
+    """ returns the shapes of chunk that paint part of a canvas of viewport (width, height), or all of them if viewport is None"""
+    return chunk if viewport is None else chunk.take(in_viewport(chunk, *viewport))
+
+def prune(chunks: Iterable[ShapeColumns], chunk_size: int = CHUNK_SIZE) -> Iterator[ShapeColumns]:
+    """ Leaves out every shape hidden under a later opaque shape
+            parameters:
+                chunks - Iterable[ShapeColumns], the chunks of shapes, which are all held at once since a shape can be hidden by any later chunk
+                chunk_size - int, the largest number of shapes in one of the chunks handed back
+    """
+    scene: list[ShapeColumns] = list(chunks)
+    if not scene:
+        return
+    columns: ShapeColumns = ShapeColumns.concat(scene)
+    columns = columns.take(~occluded(columns))
+    for start in range(0, len(columns), chunk_size):
+        yield columns.take(slice(start, start + chunk_size))
+
+def format_chunk(chunk: ShapeColumns, index: int, indents: int = 2, compact: bool = False) -> str:
+    """ returns the html lines of chunk, compact ones get css classes named after the position index of the chunk in the render"""
+    return format_compact(chunk, indents, f'c{index:x}-') if compact else format_lines(chunk, indents)
+
+def serialize(chunks: Iterable[ShapeColumns], indents: int = 2, viewport: tuple[int, int] | None = None, compact: bool = False, first_index: int = 0) -> Iterator[Fragment]:
+    """ Lazily turns chunks of shapes into the html lines a43 writes
+            parameters:
+                chunks - Iterable[ShapeColumns], the chunks of shapes (usually from generate_shapes)
+                indents - int, the number of indents in front of every line
+                viewport - tuple, the (width, height) of the canvas, shapes entirely outside it are left out (None keeps every shape)
+                compact - bool, writes the shapes with serialize.format_compact
+                first_index - int, the index of the first chunk, which names its css classes
+    """
+    for index, chunk in enumerate(chunks, start=first_index):
+        chunk = cull(chunk, viewport)
+        yield Fragment(format_chunk(chunk, index, indents, compact), len(chunk))
+
+def drain(fragments: Iterable[Fragment], sink: OutputSink, metrics: Metrics | None = None) -> int:
+    """ Writes every fragment into the sink as it arrives
+            parameters:
+                fragments - Iterable[Fragment], the serialized chunks (usually from serialize)
+                sink - OutputSink, where the lines are written
+                metrics - Metrics, times the writes as the write stage and counts the shapes, bytes and chunks written
+            returns:
+                int, the number of shapes written
+    """
+    shapes: int = 0
+    for fragment in fragments:
+        if metrics is None:
+            sink.write(fragment.text, fragment.shapes)
+        else:
+            with metrics.stage('write'):
+                sink.write(fragment.text, fragment.shapes)
+            metrics.count('bytes', len(fragment.text))
+            metrics.count('chunks')
+        shapes += fragment.shapes
+    if metrics is not None:
+        metrics.count('shapes', shapes)
+    return shapes
+
+def in_order(pool: Executor, calls: Iterable[tuple], window: int) -> Iterator:
+    """ Runs every call on the pool and hands the results back in the order of the calls
+            parameters:
+                pool - Executor, the pool of workers
+                calls - Iterable[tuple], (function, *args) of every call, only taken from as the window has room
+                window - int, the most calls in flight at once, which bounds the memory of finished but unread results
+    """
+    pending: deque[Future] = deque()
+    for function, *args in calls:
+        pending.append(pool.submit(function, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def render_chunk(config: PyArtConfig, count: int, shape_type: IntRange, entropy: int, index: int, indents: int = 2, viewport: tuple[int, int] | None = None,
+                 compact: bool = False) -> Fragment:
+    """ Generates and serializes one chunk, the unit of work of a worker process
+            parameters:
+                config - PyArtConfig, the constraints for the generated shapes
+                count - int, the number of shapes in the chunk
+                shape_type - IntRange, range of Shapes values to draw from
+                entropy - int, the root seed of the whole render
+                index - int, the position of the chunk in the render
+                indents - int, the number of indents in front of every line
+                viewport - tuple, the (width, height) of the canvas, shapes entirely outside it are left out (None keeps every shape)
+                compact - bool, writes the shapes with serialize.format_compact
+    """
+    chunk: ShapeColumns = cull(gen_columns(config, count, shape_type, ShapeStream(entropy, index)), viewport)
+    return Fragment(format_chunk(chunk, index, indents, compact), len(chunk))
+
+def render_shapes(config: PyArtConfig, count: int, shape_type: IntRange = IntRange(0, 2), workers: int = 1, chunk_size: int = CHUNK_SIZE, seed: int | None = None, indents: int = 2,
+                  viewport: tuple[int, int] | None = None, pruned: bool = False, compact: bool = False, first_index: int = 0, metrics: Metrics | None = None) -> Iterator[Fragment]:
+    """ Lazily generates and serializes count shapes, in order, using a pool of worker processes
+            parameters:
+                config - PyArtConfig, the constraints for the generated shapes
+                count - int, the total number of shapes
+                shape_type - IntRange, range of Shapes values to draw from
+                workers - int, the number of worker processes (1 renders in this process)
+                chunk_size - int, the largest number of shapes in one chunk
+                seed - int, the seed of the render, the output for a seed does not depend on workers
+                indents - int, the number of indents in front of every line
+                viewport - tuple, the (width, height) of the canvas, shapes entirely outside it are left out (None keeps every shape)
+                pruned - bool, leaves out the shapes hidden under later opaque shapes, which needs the whole scene so it renders in this process
+                compact - bool, writes the shapes with serialize.format_compact
+                first_index - int, the index of the first chunk (see generate_shapes)
+                metrics - Metrics, times the shapes generated in this process as the generate stage and pruning as the prune stage
+    """
+    chunks = generate_shapes(config, count, shape_type, chunk_size, seed, first_index)
+    if metrics is not None:
+        chunks = metrics.timed(chunks, 'generate')
+    if pruned:
+        chunks = prune(chunks, chunk_size)
+        yield from serialize(chunks if metrics is None else metrics.timed(chunks, 'prune'), indents, viewport, compact, first_index)
+        return
+    if workers <= 1:
+        yield from serialize(chunks, indents, viewport, compact, first_index)
+        return
+
+    entropy: int = root_entropy(seed)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        calls = ((render_chunk, config, min(chunk_size, count - start), shape_type, entropy, index, indents, viewport, compact)
+                 for index, start in enumerate(range(0, count, chunk_size), start=first_index))
+        yield from in_order(pool, calls, 2 * workers)
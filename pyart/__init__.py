@@ -0,0 +1,6 @@
+#the core shared by a41, a42 and a43: the shape types and ranges, the random streams, the shape config and the one output writer
+#importing it only loads the standard library, the NumPy versions of the generator and formatter are the pyart.columns and pyart.serialize modules
+from pyart.core import (Shapes, FloatRange, IntRange, Colours, CHUNK_SIZE, FIELDS, SHAPE_FIELDS, RANGE_KEYS, DEFAULT_RANGES, ShapeStream, ShapeDraws,
+                        gen_int, gen_float, root_entropy, read_pair, check_range, hex_colour, short_number, fill_opacity, read_config)
+from pyart.config import PyArtConfig, input_ranges, add_range_arguments, range_overrides
+from pyart.output import BrotliFile, OutputSink
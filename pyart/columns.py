@@ -0,0 +1,147 @@
+from typing import NamedTuple
+import numpy as np
+from pyart.core import IntRange, FloatRange, Shapes, FIELDS, SHAPE_FIELDS, GOLDEN, UNIT, ShapeStream, root_entropy
+from pyart.config import PyArtConfig
+
+class ShapeColumns(NamedTuple):
+    """ class for a batch of generated shapes, one NumPy array per attribute (row i of every column is shape i)"""
+    shape: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    rad: np.ndarray
+    rx: np.ndarray
+    ry: np.ndarray
+    width: np.ndarray
+    height: np.ndarray
+    red: np.ndarray
+    green: np.ndarray
+    blue: np.ndarray
+    opacity: np.ndarray
+
+    def __len__(self) -> int:
+        """ returns the number of shapes in the batch"""
+        return len(self.shape)
+
+    @property
+    def nbytes(self) -> int:
+        """ returns the memory used by all of the columns"""
+        return sum(column.nbytes for column in self)
+
+    def take(self, index) -> "ShapeColumns":
+        """ returns the shapes selected by index (a slice, boolean mask or array of positions)"""
+        return ShapeColumns(*(column[index] for column in self))
+
+    @classmethod
+    def concat(cls, chunks: list["ShapeColumns"]) -> "ShapeColumns":
+        """ returns the chunks joined into one batch, in order (an empty batch when there are no chunks, e.g. a render of 0 shapes)"""
+        if not chunks:
+            return cls(*(np.zeros(0, dtype=np.float64 if field == 'opacity' else np.int64) for field in cls._fields))
+        return cls(*(np.concatenate(columns) for columns in zip(*chunks)))
+
+
+class ShapeBatch:
+    """ Class that holds a batch of shapes as one set of typed arrays per shape type, with only the fields that type uses"""
+
+    FIELDS: dict[int, tuple[str, ...]] = SHAPE_FIELDS #the fields each shape type stores, keyed by Shapes value
+
+    def __init__(self, shape: np.ndarray, groups: dict[int, dict[str, np.ndarray]]) -> None:
+        """ Initalizes the class
+                parameters:
+                    shape - np.ndarray, the Shapes value of every shape in painter's order
+                    groups - dict, maps a Shapes value to its field arrays, in the order those shapes appear in shape
+                            (opacity is stored in hundredths as integers)
+        """
+        self.shape = shape
+        self.groups = groups
+
+    def __len__(self) -> int:
+        """ returns the number of shapes in the batch"""
+        return len(self.shape)
+
+    @property
+    def nbytes(self) -> int:
+        """ returns the memory used by all of the arrays"""
+        return self.shape.nbytes + sum(array.nbytes for group in self.groups.values() for array in group.values())
+
+    @classmethod
+    def from_columns(cls, columns: ShapeColumns) -> "ShapeBatch":
+        """ Returns the compact form of a batch of columns, dropping the fields each shape does not use"""
+        groups: dict[int, dict[str, np.ndarray]] = {}
+        for value, fields in cls.FIELDS.items():
+            index = np.flatnonzero(columns.shape == value)
+            groups[value] = {field: compact(getattr(columns, field)[index]) for field in fields}
+            groups[value]['opacity'] = compact(np.rint(groups[value]['opacity'] * 100).astype(np.int64))
+        return cls(compact(columns.shape), groups)
+
+    def group(self, shape: Shapes) -> dict[str, np.ndarray]:
+        """ returns the field arrays of every shape of one type, with opacity back as a float"""
+        group: dict[str, np.ndarray] = dict(self.groups[shape.value])
+        group['opacity'] = group['opacity'] / 100
+        return group
+
+    def to_columns(self) -> ShapeColumns:
+        """ Returns the batch as full columns in painter's order, the fields a shape does not use are 0"""
+        count: int = len(self)
+        columns: dict[str, np.ndarray] = {field: np.zeros(count, dtype=np.int64) for field in ShapeColumns._fields}
+        columns['shape'] = self.shape
+        columns['opacity'] = np.zeros(count)
+        for value in self.FIELDS:
+            index = np.flatnonzero(self.shape == value)
+            for field, array in self.group(Shapes(value)).items():
+                columns[field][index] = array
+        return ShapeColumns(**columns)
+
+
+# STATIC FUNCTIONS
+def compact(array: np.ndarray) -> np.ndarray:
+    """ returns the integer array in the smallest dtype that holds its values (float arrays are returned as is)"""
+    if array.dtype.kind not in 'iu' or array.size == 0:
+        return array
+    return array.astype(int_dtype(IntRange(int(array.min()), int(array.max()))), copy=False)
+
+def int_dtype(r: IntRange) -> np.dtype:
+    """ returns the smallest integer dtype that holds every value of the range"""
+    for dtype in (np.uint8, np.uint16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= r.imin and r.imax <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+def gen_bits(key: int, numbers: np.ndarray) -> np.ndarray:
+    """ Returns the 64 random bits of every number of a ShapeStream with key, the column version of ShapeStream.bits"""
+    z = np.uint64(key) + (numbers + np.uint64(1)) * np.uint64(GOLDEN) #wraps around at 2**64 like the & MASK of mix64
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return z ^ (z >> np.uint64(31))
+
+def gen_ints(key: int, numbers: np.ndarray, r: IntRange) -> np.ndarray:
+    """Generates the integers of the range drawn by every number, the column version of ShapeStream.integer"""
+    offsets = (gen_bits(key, numbers) >> np.uint64(32)) * np.uint64(r.imax - r.imin + 1) >> np.uint64(32)
+    return (offsets.astype(np.int64) + r.imin).astype(int_dtype(r))
+
+def gen_floats(key: int, numbers: np.ndarray, r: FloatRange) -> np.ndarray:
+    """Generates the floats of the range drawn by every number rounded to 2 decimal spaces, the column version of gen_float"""
+    values = r.fmin + (r.fmax - r.fmin) * ((gen_bits(key, numbers) >> np.uint64(11)).astype(np.float64) * UNIT)
+    scaled = values * 100
+    rounded = np.rint(scaled) / 100
+    #round() rounds the exact value, which only gives another answer when values * 100 lands right next to a half
+    halves = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    rounded[halves] = [round(value, 2) for value in values[halves].tolist()]
+    return rounded
+
+def gen_columns(config: PyArtConfig, count: int, shape_type: IntRange, stream: ShapeStream | None = None) -> ShapeColumns:
+    """ Generates every attribute of count shapes at once
+            parameters:
+                config - PyArtConfig, the constraints for the generated shapes
+                count - int, the number of shapes to generate
+                shape_type - IntRange, range of Shapes values the shape column is drawn from
+                stream - ShapeStream, the random numbers of the chunk (a fresh unseeded one if None), the shapes are the ones a43's shape classes draw from it (see ShapeDraws)
+            returns:
+                ShapeColumns, every column holds a value for every shape, even fields the shape type does not use
+    """
+    stream = ShapeStream(root_entropy(None), 0) if stream is None else stream
+    first = np.arange(count, dtype=np.uint64) * np.uint64(len(FIELDS)) #the number the first field of every shape draws
+    ranges: dict = {'shape': shape_type, 'x': config.viewport, 'y': config.viewport} | {field: getattr(config, field) for field in FIELDS[3:]}
+    columns: dict[str, np.ndarray] = {field: gen_ints(stream.key, first + np.uint64(position), ranges[field]) for position, field in enumerate(FIELDS) if field != 'opacity'}
+    columns['opacity'] = gen_floats(stream.key, first + np.uint64(FIELDS.index('opacity')), config.opacity)
+    return ShapeColumns(**columns)
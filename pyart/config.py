@@ -0,0 +1,96 @@
+import argparse
+import random as rd
+from pyart.core import (FloatRange, IntRange, Colours, RANGE_KEYS, DEFAULT_RANGES, read_pair, check_range, read_config)
+
+class PyArtConfig:
+    """ sets the configurations for shapes to be displayed"""
+    counter: int = 1 #counts the number of shapes created
+    
+    def __init__(self, viewport: IntRange, rad: IntRange, rx: IntRange, ry: IntRange, width: IntRange, height: IntRange, red: Colours.red, green: Colours.green, blue: Colours.blue, opacity: Colours.opacity, rng: rd.Random | None = None) -> None:
+        """ Initiates the class and sets configurations 
+                parameters:
+                    viewport - Intrange, window range the shapes can be within
+                    rad - IntRange, determines radius of circle
+                    rx - IntRange, determines rx in ellipse 
+                    ry - IntRange, determines ry in ellipse
+                    width - IntRange, determines width of rectangle 
+                    height - IntRange, determines height of rectangle
+                    red - (Colours.red) IntRange, determines red rgb number
+                    green - (Colours.green) IntRange, determines green rgb number
+                    blue - (Colours.blue) IntRange, determines blue rgb number
+                    opacity - (Colours.opacity) Intrange, determines the opactiy
+                    rng - random.Random, seeded generator the shapes draw from (global random module if None)
+    
+        """
+        self.viewport = viewport
+        self.rad = rad
+        self.rx = rx
+        self.ry = ry
+        self.width = width
+        self.height = height
+        self.red = red
+        self.green = green
+        self.blue = blue
+        self.opacity = opacity
+        self.rng = rng
+        PyArtConfig.counter +=1
+
+    @classmethod
+    def get_count(cls) -> int:
+        """ returns the number of instances created from this class"""
+        return cls.counter
+    
+    @classmethod
+    def from_input(cls, viewport: IntRange, rng: rd.Random | None = None) -> any:
+        """ Modifies and returns the class based on the user input. Creates the configurations used for shape constraints.
+                raises:
+                    ValueError, if an answer is not a number or a range's min is greater than its max (see from_dict)
+        """
+        return cls.from_dict(input_ranges(), viewport, rng)
+
+    @classmethod
+    def from_dict(cls, data: dict, viewport: IntRange, rng: rd.Random | None = None) -> any:
+        """ Returns the class with the constraints found in data, without asking for input
+                parameters:
+                    data - dict, maps each of RANGE_KEYS to a [min, max] pair ("ellipse" sets rx and ry together), missing keys use DEFAULT_RANGES
+                    viewport - IntRange, window range the shapes can be within
+                    rng - random.Random, seeded generator the shapes draw from
+                raises:
+                    ValueError, if a range is not a [min, max] pair or its min is greater than its max
+        """
+        ranges: dict = {}
+        for key in RANGE_KEYS:
+            value = data.get(key, data.get('ellipse') if key in ('rx', 'ry') else None)
+            value = DEFAULT_RANGES[key] if value is None else value
+            r = FloatRange(*read_pair(key, value, float)) if key == 'opacity' else IntRange(*read_pair(key, value, int))
+            ranges[key] = check_range(key, r)
+        return cls(viewport = check_range('viewport', viewport), rng = rng, **ranges)
+
+    @classmethod
+    def from_file(cls, path: str, viewport: IntRange, rng: rd.Random | None = None) -> any:
+        """ Returns the class with the constraints read from a JSON or TOML file (see from_dict for the keys)"""
+        return cls.from_dict(read_config(path), viewport, rng)
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace, viewport: IntRange, rng: rd.Random | None = None) -> any:
+        """ Returns the class with the constraints given as command line flags (see add_range_arguments)"""
+        return cls.from_dict(range_overrides(args), viewport, rng)
+
+
+# STATIC FUNCTIONS
+def input_ranges() -> dict:
+    """ Asks the user for the min and max of every shape constraint, returns them keyed like PyArtConfig.from_dict expects"""
+    prompts: tuple[tuple[str, str, str], ...] = (('rad', 'radius Min:', 'radius Max:'), ('ellipse', 'ellipse min:', 'ellipse max:'), ('width', 'min width:', 'max width:'),
+                                                 ('height', 'min height:', 'max height:'), ('red', 'min red:', 'max red:'), ('green', 'min green:', 'max green:'),
+                                                 ('blue', 'min blue:', 'max blue:'), ('opacity', 'min opacity:', 'max opacity:'))
+    #the answers are kept as typed, from_dict turns them into numbers and names the range of one that is not
+    return {key: (input(low), input(high)) for key, low, high in prompts}
+
+def add_range_arguments(parser: argparse.ArgumentParser) -> None:
+    """ Adds a --<name> MIN MAX flag for every shape constraint (and --ellipse for rx and ry together)"""
+    for key in RANGE_KEYS + ('ellipse',):
+        parser.add_argument(f'--{key}', nargs=2, type=float if key == 'opacity' else int, metavar=('MIN', 'MAX'), help=f'range of the {key} of the shapes')
+
+def range_overrides(args: argparse.Namespace) -> dict:
+    """ Returns the shape constraints that were given as command line flags"""
+    return {key: value for key in RANGE_KEYS + ('ellipse',) if (value := getattr(args, key, None)) is not None}
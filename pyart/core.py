@@ -0,0 +1,189 @@
+from typing import NamedTuple
+from enum import Enum
+import json
+import random as rd
+
+class Shapes(Enum):
+    """ Enumerator shapes class"""
+    CIRCLE = 0
+    RECTANGLE = 1
+    ELLIPSE = 2
+    
+class FloatRange(NamedTuple):
+    """class for the float ranges"""
+    fmin: float
+    fmax: float
+
+class IntRange(NamedTuple):
+    """class for the integer ranges"""
+    imin: int
+    imax: int
+
+class Colours(NamedTuple):
+    """Class for the different colours"""
+    red: IntRange
+    green: IntRange
+    blue: IntRange
+    opacity: FloatRange
+
+CHUNK_SIZE: int = 1 << 16 #shapes per chunk, bounds the memory a render holds at once
+
+#every number a generated shape draws, in the order it draws them, and the ones each shape type uses
+FIELDS: tuple[str, ...] = ('shape', 'x', 'y', 'rad', 'rx', 'ry', 'width', 'height', 'red', 'green', 'blue', 'opacity')
+SHAPE_FIELDS: dict[int, tuple[str, ...]] = {
+    Shapes.CIRCLE.value: ('x', 'y', 'rad', 'red', 'green', 'blue', 'opacity'),
+    Shapes.RECTANGLE.value: ('x', 'y', 'width', 'height', 'red', 'green', 'blue', 'opacity'),
+    Shapes.ELLIPSE.value: ('x', 'y', 'rx', 'ry', 'red', 'green', 'blue', 'opacity'),
+}
+
+MASK: int = (1 << 64) - 1
+GOLDEN: int = 0x9e3779b97f4a7c15 #the step between the counters of a stream (2**64 over the golden ratio)
+UNIT: float = 2.0 ** -53 #turns the top 53 bits of a number into a float in [0, 1)
+WIDEST: int = 1 << 32 #most values an IntRange can hold, so a draw scaled to it fits in 64 bits
+
+class ShapeStream:
+    """ Class for the random numbers of one chunk of a render. Number n is mix64 of the key plus n + 1 steps, so the numbers can be drawn in any order,
+        in pure Python here or all at once with NumPy by pyart.columns.gen_columns, and are the same either way.
+        Shape i of the chunk draws numbers i * len(FIELDS) onwards in the order of FIELDS."""
+    __slots__ = ('key', 'drawn')
+
+    def __init__(self, entropy: int, index: int) -> None:
+        """ Initalizes the class
+                parameters:
+                    entropy - int, the root seed of the whole render (see root_entropy)
+                    index - int, the position of the chunk in the render
+        """
+        self.key: int = stream_key(entropy, index)
+        self.drawn: int = 0 #numbers handed out by randint, uniform and random
+
+    def bits(self, number: int) -> int:
+        """ returns number n of the stream as 64 random bits"""
+        return mix64((self.key + (number + 1) * GOLDEN) & MASK)
+
+    def integer(self, number: int, r: IntRange) -> int:
+        """ returns number n of the stream as an integer of the range"""
+        return r.imin + ((self.bits(number) >> 32) * (r.imax - r.imin + 1) >> 32)
+
+    def real(self, number: int, r: FloatRange) -> float:
+        """ returns number n of the stream as a float of the range"""
+        return r.fmin + (r.fmax - r.fmin) * ((self.bits(number) >> 11) * UNIT)
+
+    def randint(self, a: int, b: int) -> int:
+        """ returns the next number as an integer from a to b, so the stream can stand in for a random.Random in gen_int"""
+        self.drawn += 1
+        return self.integer(self.drawn - 1, IntRange(a, b))
+
+    def uniform(self, a: float, b: float) -> float:
+        """ returns the next number as a float from a to b, so the stream can stand in for a random.Random in gen_float"""
+        self.drawn += 1
+        return self.real(self.drawn - 1, FloatRange(a, b))
+
+class ShapeDraws:
+    """ Class for the numbers one shape of a ShapeStream draws, handed out in the order of its SHAPE_FIELDS, so a43's shape classes
+        can draw from it through gen_int and gen_float and get the shape pyart.columns.gen_columns makes from the same numbers"""
+    __slots__ = ('stream', 'numbers')
+    POSITIONS: dict[int, tuple[int, ...]] = {value: tuple(FIELDS.index(field) for field in fields) for value, fields in SHAPE_FIELDS.items()}
+
+    def __init__(self, stream: ShapeStream, first: int, shape: int) -> None:
+        """ Initalizes the class
+                parameters:
+                    stream - ShapeStream, the random numbers of the chunk
+                    first - int, the number the shape type of the shape was drawn from (the shape's index in the chunk times len(FIELDS))
+                    shape - int, the Shapes value of the shape
+        """
+        self.stream = stream
+        self.numbers = iter([first + position for position in ShapeDraws.POSITIONS[shape]])
+
+    def randint(self, a: int, b: int) -> int:
+        """ returns the number of the next field as an integer from a to b"""
+        return self.stream.integer(next(self.numbers), IntRange(a, b))
+
+    def uniform(self, a: float, b: float) -> float:
+        """ returns the number of the next field as a float from a to b"""
+        return self.stream.real(next(self.numbers), FloatRange(a, b))
+
+# STATIC FUNCTIONS
+def gen_int(r: IntRange, rng: rd.Random | None = None) -> int:
+    """Generates a random integer (from rng, or the global random module if None)"""
+    return (rd if rng is None else rng).randint(r.imin, r.imax)
+
+def gen_float(r: FloatRange, rng: rd.Random | None = None) -> float:
+    """Generates a random float (from rng, or the global random module if None)"""
+    return round((rd if rng is None else rng).uniform(r.fmin,r.fmax),2) #rounds to 2 decimal spaces
+
+def mix64(z: int) -> int:
+    """ Returns the 64 bit number splitmix64 scrambles a counter into"""
+    z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9 & MASK
+    z = (z ^ (z >> 27)) * 0x94d049bb133111eb & MASK
+    return z ^ (z >> 31)
+
+def root_entropy(seed: int | None) -> int:
+    """ returns the root entropy of a render, seed itself or fresh entropy from the OS when seed is None"""
+    if seed is None:
+        return rd.SystemRandom().getrandbits(128)
+    if seed < 0:
+        raise ValueError(f'seed: {seed} must not be negative')
+    return seed
+
+def stream_key(entropy: int, index: int) -> int:
+    """ Returns the key of the random numbers of chunk index of a render, which only depends on entropy and index so any process can rebuild it"""
+    key: int = mix64(index)
+    while True:
+        #folds in the entropy 64 bits at a time, so seeds of any size give different keys
+        key = mix64(((key ^ (entropy & MASK)) + GOLDEN) & MASK)
+        entropy >>= 64
+        if not entropy:
+            return key
+
+#the shape constraints a config file or the command line can set, and the values used when one is left out
+RANGE_KEYS: tuple[str, ...] = ('rad', 'rx', 'ry', 'width', 'height', 'red', 'green', 'blue', 'opacity')
+DEFAULT_RANGES: dict[str, tuple] = {'rad': (0, 100), 'rx': (10, 30), 'ry': (10, 30), 'width': (10, 100), 'height': (10, 100), 'red': (0, 255), 'green': (0, 255), 'blue': (0, 255), 'opacity': (0.0, 1.0)}
+
+def read_pair(name: str, value: any, kind: type) -> tuple:
+    """ Returns a [min, max] pair read from a config as a tuple of kind (int or float), raises ValueError naming the range if it is anything else"""
+    try:
+        if isinstance(value, (str, bytes)):
+            raise TypeError(value)
+        low, high = value
+        return kind(low), kind(high)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name}: expected [min, max], got {value!r}') from None
+
+def check_range(name: str, r: IntRange | FloatRange) -> IntRange | FloatRange:
+    """ Returns the range if its min is not greater than its max (and an IntRange holds at most WIDEST values), raises ValueError otherwise"""
+    if r[0] > r[1]:
+        raise ValueError(f'{name}: min {r[0]} is greater than max {r[1]}')
+    if isinstance(r, IntRange) and r.imax - r.imin >= WIDEST:
+        raise ValueError(f'{name}: at most {WIDEST} values between min and max')
+    return r
+
+def hex_colour(red: int, green: int, blue: int) -> str:
+    """ Returns the shortest css hex form of a colour, #rgb when every channel repeats its digit and #rrggbb otherwise"""
+    text: str = f'{red:02x}{green:02x}{blue:02x}'
+    if text[0::2] == text[1::2]:
+        return '#' + text[0::2]
+    return '#' + text
+
+def short_number(value: float) -> str:
+    """ Returns a number without the leading zero or trailing .0 that svg does not need (0.5 gives .5, 1.0 gives 1)"""
+    text: str = repr(value)
+    if text.endswith('.0'):
+        text = text[:-2]
+    if text.startswith('0.'):
+        text = text[1:]
+    elif text.startswith('-0.'):
+        text = '-' + text[2:]
+    return text
+
+def fill_opacity(opacity: float) -> str:
+    """ Returns the fill-opacity attribute of a compact shape, nothing when it is the default of fully opaque"""
+    return '' if opacity >= 1 else f' fill-opacity="{short_number(opacity)}"'
+
+def read_config(path: str) -> dict | list:
+    """ Reads a config file, TOML if the name ends in .toml and JSON otherwise"""
+    if path.endswith('.toml'):
+        import tomllib #only config files need the TOML parser
+        with open(path, 'rb') as file:
+            return tomllib.load(file)
+    with open(path) as file:
+        return json.load(file)
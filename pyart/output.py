@@ -0,0 +1,128 @@
+from typing import IO
+import gzip
+
+class BrotliFile:
+    """ Class for a binary file that brotli compresses everything written to it (needs the brotli package)"""
+    def __init__(self, path: str, quality: int = 5) -> None:
+        """ Initalizes the class
+                parameters:
+                    path - str, the name of the compressed file
+                    quality - int, the brotli quality from 0 (fastest) to 11 (smallest)
+        """
+        try:
+            import brotli
+        except ImportError:
+            raise ImportError('brotli output needs the brotli package (pip install brotli), use gzip instead') from None
+        self.__compressor = brotli.Compressor(quality=quality)
+        self.__file: IO = open(path, 'wb')
+
+    @property
+    def closed(self) -> bool:
+        """ returns whether the file has been closed"""
+        return self.__file.closed
+
+    def write(self, data: bytes) -> None:
+        """ compresses data into the file"""
+        self.__file.write(self.__compressor.process(data))
+
+    def flush(self) -> None:
+        """ pushes what is already compressed out to the file"""
+        self.__file.flush()
+
+    def close(self) -> None:
+        """ writes the end of the compressed stream and closes the file"""
+        if not self.__file.closed:
+            self.__file.write(self.__compressor.finish())
+            self.__file.close()
+
+class OutputSink:
+    """ Class that owns the one open file handle that every writer of a document shares"""
+    BUFFER_SIZE: int = 1 << 20 #1 MiB write buffer
+    COMPRESSIONS: dict[str, str] = {'gzip': '.gz', 'br': '.br'} #the compressed copies a sink can write, with the suffix of their file
+    def __init__(self, file: str | IO, mode: str = 'w', buffer_size: int = BUFFER_SIZE, flush_bytes: int = 0, flush_shapes: int = 0, compress: tuple[str, ...] = (),
+                 offset: int | None = None) -> None:
+        """ Initalizes the class
+                parameters:
+                    file - str | IO, the name of the file (gzip compressed if it ends in .gz), or an already open text stream (e.g. sys.stdout) that the sink writes to but does not close
+                    mode - str, the mode the file is opened with ('w' truncates, 'a' appends)
+                    buffer_size - int, size in bytes of the write buffer
+                    flush_bytes - int, flushes after this many bytes are written (0 only flushes when the buffer is full or on close)
+                    flush_shapes - int, flushes after this many shapes are written (0 only flushes when the buffer is full or on close)
+                    compress - tuple, also streams a precompressed copy of the file next to it for each of these ('gzip' writes file.gz, 'br' writes file.br)
+                    offset - int, starts writing at this byte of an existing file and drops everything after it (mode is ignored)
+                raises:
+                    ValueError, for an unknown compression or one that cannot be combined with file or mode
+        """
+        unknown: set[str] = set(compress) - set(OutputSink.COMPRESSIONS)
+        if unknown:
+            raise ValueError(f'compress: unknown compression {", ".join(sorted(unknown))}, choose from {", ".join(OutputSink.COMPRESSIONS)}')
+        if compress and not isinstance(file, str):
+            raise ValueError('compress: compressed copies need a file name to write next to')
+        if 'br' in compress and mode == 'a':
+            raise ValueError('compress: a brotli copy cannot be appended to')
+        if offset is not None and (compress or not isinstance(file, str) or file.endswith('.gz')):
+            raise ValueError('offset: only an uncompressed file can be written from an offset')
+        #every compressed copy is fed the same text as the file, so it never has to be read back
+        self.__copies: list[IO] = [gzip.open(file + '.gz', mode + 'b') if codec == 'gzip' else BrotliFile(file + '.br') for codec in compress]
+        self.__owns_file: bool = isinstance(file, str)
+        if not self.__owns_file:
+            self.__file: IO = file
+        elif file.endswith('.gz'):
+            self.__file = gzip.open(file, mode + 't', encoding='utf-8')
+        elif offset is not None:
+            self.__file = open(file, 'r+', buffering=buffer_size)
+            self.__file.seek(offset)
+            self.__file.truncate()
+        else:
+            self.__file = open(file, mode, buffering=buffer_size)
+        self.flush_bytes = flush_bytes
+        self.flush_shapes = flush_shapes
+        self.__pending_bytes: int = 0
+        self.__pending_shapes: int = 0
+
+    def __enter__(self) -> "OutputSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        """ returns whether the underlying file has been closed"""
+        return self.__file.closed
+
+    def write(self, content: str, shapes: int = 0) -> None:
+        """ writes content into the buffer and flushes it if the flush policy says so
+                parameters:
+                    content - str, the already formatted text to write
+                    shapes - int, the number of shapes contained in content
+        """
+        self.__file.write(content)
+        if self.__copies:
+            data: bytes = content.encode('utf-8')
+            for copy in self.__copies:
+                copy.write(data)
+        self.__pending_bytes += len(content)
+        self.__pending_shapes += shapes
+        if (self.flush_bytes and self.__pending_bytes >= self.flush_bytes) or (self.flush_shapes and self.__pending_shapes >= self.flush_shapes):
+            self.flush()
+
+    def tell(self) -> int:
+        """ flushes and returns the byte offset the next write goes to"""
+        self.flush()
+        return self.__file.tell()
+
+    def flush(self) -> None:
+        """ pushes everything in the buffer out to the file"""
+        self.__file.flush()
+        self.__pending_bytes = 0
+        self.__pending_shapes = 0
+
+    def close(self) -> None:
+        """ flushes and closes the file and its compressed copies, closing twice does nothing"""
+        if not self.__file.closed:
+            self.flush()
+            if self.__owns_file:
+                self.__file.close()
+        for copy in self.__copies:
+            copy.close()
@@ -0,0 +1,156 @@
+from typing import Callable
+import numpy as np
+from pyart.core import Shapes, fill_opacity
+from pyart.output import OutputSink
+from pyart.columns import ShapeColumns, ShapeBatch
+from pyart.text import IDENTATION, TEMPLATES
+
+#the write_compact() formats, where paint is the fill (or the class) and alpha the fill-opacity attribute, both with their leading space
+COMPACT_TEMPLATES: dict[int, tuple[str, tuple[str, ...]]] = {
+    Shapes.CIRCLE.value: ('<circle cx="{}" cy="{}" r="{}"{}{}/>', ('x', 'y', 'rad', 'paint', 'alpha')),
+    Shapes.RECTANGLE.value: ('<rect x="{}" y="{}" width="{}" height="{}"{}{}/>', ('x', 'y', 'width', 'height', 'paint', 'alpha')),
+    Shapes.ELLIPSE.value: ('<ellipse cx="{}" cy="{}" rx="{}" ry="{}"{}/>', ('x', 'y', 'rx', 'ry', 'paint')),
+}
+
+#the rows a42's Table.elements() writes, with the column of every cell after the count
+TABLE_ROW: str = '      <tr>\n        <td>{}\n' + '        <td>{}</td>\n' * 12 + '      </tr>\n'
+TABLE_FIELDS: tuple[str, ...] = ('shape', 'x', 'y', 'rad', 'rx', 'ry', 'width', 'height', 'red', 'green', 'blue', 'opacity')
+SHAPE_NAMES = np.array([shape.name for shape in Shapes], dtype=object)
+
+#the same rows as JSON arrays (each one led by a comma), for table data loaded by the page
+JSON_ROW: str = ',[' + ','.join(['{}'] * (len(TABLE_FIELDS) + 1)) + ']'
+JSON_NAMES = np.array([f'"{shape.name}"' for shape in Shapes], dtype=object)
+
+LOOKUP_LIMIT: int = 1 << 20 #widest value range that is turned into text through a lookup table
+
+# STATIC FUNCTIONS
+def to_strings(column: np.ndarray, form: Callable = repr) -> np.ndarray:
+    """ Turns a column of numbers into the text write_line() gives them
+            parameters:
+                column - np.ndarray, integers, or floats rounded to 2 decimal spaces
+                form - Callable, turns one float into its text (integers always use str)
+            returns:
+                np.ndarray, an object array of str, where equal values share one str
+    """
+    if column.size == 0:
+        return np.empty(0, dtype=object)
+    if column.dtype.kind == 'f':
+        #opacities are hundredths, so they are looked up by their integer number of hundredths
+        hundredths = np.rint(column * 100)
+        if not np.array_equal(hundredths / 100, column):
+            return np.array([form(value) for value in column.tolist()], dtype=object)
+        column = hundredths.astype(np.int64)
+        lowest, highest = int(column.min()), int(column.max())
+        table = [form(value / 100) for value in range(lowest, highest + 1)]
+    else:
+        lowest, highest = int(column.min()), int(column.max())
+        if highest - lowest > LOOKUP_LIMIT:
+            return np.array([str(value) for value in column.tolist()], dtype=object)
+        table = [str(value) for value in range(lowest, highest + 1)]
+    return np.array(table, dtype=object)[column.astype(np.int64) - lowest]
+
+def hex_strings(red: np.ndarray, green: np.ndarray, blue: np.ndarray) -> np.ndarray:
+    """ returns an object array of the hex_colour() of every colour"""
+    digits = np.array([f'{value:02x}' for value in range(256)], dtype=object)
+    short = np.array([f'{value:x}'[0] for value in range(256)], dtype=object)
+    hexes = '#' + digits[red] + digits[green] + digits[blue]
+    repeats = (red % 17 == 0) & (green % 17 == 0) & (blue % 17 == 0) #0x11 times a digit writes that digit twice
+    hexes[repeats] = '#' + short[red[repeats]] + short[green[repeats]] + short[blue[repeats]]
+    return hexes
+
+def format_lines(columns: ShapeColumns, indents: int = 2, templates: dict[int, tuple[str, tuple[str, ...]]] = TEMPLATES, formatted: dict[str, np.ndarray] | None = None) -> str:
+    """ Formats a whole batch of shapes into the lines a43 writes into the html file
+            parameters:
+                columns - ShapeColumns, the batch of shapes
+                indents - int, the number of indents in front of every line
+                templates - dict, the format of each shape type and the fields that fill it in
+                formatted - dict, already formatted object arrays of str for the fields that are not columns
+            returns:
+                str, one line per shape in batch order, by default identical to each shape's write_line() plus indents and newline
+    """
+    tabs: str = IDENTATION * indents
+    width: int = 2 * max(len(fields) for _, fields in templates.values()) + 1
+    formatted = formatted or {}
+
+    #every row holds the pieces of one line in painter's order: text, value, text, value ... text, padded with ''
+    pieces = np.empty((len(columns), width), dtype=object)
+    for value, (template, fields) in templates.items():
+        index = np.flatnonzero(columns.shape == value)
+        if index.size == 0:
+            continue
+        texts: list[str] = f'{tabs}{template}\n'.split('{}')
+        block = np.empty((index.size, width), dtype=object)
+        block[:, 2 * len(fields):] = ''
+        for position, text in enumerate(texts):
+            block[:, 2 * position] = text
+        for position, field in enumerate(fields):
+            block[:, 2 * position + 1] = formatted[field][index] if field in formatted else to_strings(getattr(columns, field)[index])
+        pieces[index] = block
+    return ''.join(pieces.ravel().tolist())
+
+def format_compact(columns: ShapeColumns, indents: int = 0, prefix: str = 'c') -> str:
+    """ Formats a whole batch of shapes into the shortest lines that draw the same picture
+            parameters:
+                columns - ShapeColumns, the batch of shapes
+                indents - int, the number of indents in front of every line
+                prefix - str, starts the name of every css class of the batch, so it has to differ between the batches of one document
+            returns:
+                str, a <style> line with a class for every colour that is cheaper to share than to repeat, then one write_compact() line per shape
+    """
+    if len(columns) == 0:
+        return ''
+    packed = (columns.red.astype(np.int64) << 16) | (columns.green.astype(np.int64) << 8) | columns.blue.astype(np.int64)
+    colours, inverse, counts = np.unique(packed, return_inverse=True, return_counts=True)
+    hexes = hex_strings(colours >> 16, (colours >> 8) & 255, colours & 255)
+    paints = ' fill="' + hexes + '"'
+
+    #a repeated colour gets a class when its rule costs less than the bytes the class saves on every shape that uses it
+    rules: list[str] = []
+    for colour in np.flatnonzero(counts > 1).tolist():
+        name: str = f'{prefix}{len(rules):x}'
+        shared: str = f' class="{name}"'
+        rule: str = f'.{name}{{fill:{hexes[colour]}}}'
+        if counts[colour] * (len(paints[colour]) - len(shared)) > len(rule):
+            paints[colour] = shared
+            rules.append(rule)
+    formatted: dict[str, np.ndarray] = {'paint': paints[inverse.ravel()], 'alpha': to_strings(columns.opacity, fill_opacity)}
+    style: str = f'{IDENTATION * indents}<style>{"".join(rules)}</style>\n' if rules else ''
+    return style + format_lines(columns, indents, COMPACT_TEMPLATES, formatted)
+
+def format_rows(columns: ShapeColumns, count: int = 1, row: str = TABLE_ROW, missing: str = 'None', names: np.ndarray = SHAPE_NAMES) -> str:
+    """ Formats a whole batch of shapes into rows of a42's html table
+            parameters:
+                columns - ShapeColumns, the batch of shapes
+                count - int, the number in the CNT cell of the first row
+                row - str, the template of one row, with a {} for the count and for each of TABLE_FIELDS
+                missing - str, the text of the cells a shape does not use
+                names - np.ndarray, the text of each shape type's name, indexed by Shapes value
+            returns:
+                str, one row per shape in batch order, by default identical to what Table.elements() writes (JSON_ROW, 'null' and JSON_NAMES give JSON arrays)
+    """
+    texts: list[str] = row.split('{}')
+    pieces = np.empty((len(columns), 2 * len(texts) - 1), dtype=object)
+    for position, text in enumerate(texts):
+        pieces[:, 2 * position] = text
+    pieces[:, 1] = to_strings(np.arange(count, count + len(columns)))
+    pieces[:, 3] = names[columns.shape]
+    for position, field in enumerate(TABLE_FIELDS[1:], start=2):
+        pieces[:, 2 * position + 1] = to_strings(getattr(columns, field))
+
+    #blanks out the cells of the fields each shape type does not have
+    for value, fields in ShapeBatch.FIELDS.items():
+        index = np.flatnonzero(columns.shape == value)
+        for position, field in enumerate(TABLE_FIELDS[1:], start=2):
+            if field not in fields:
+                pieces[index, 2 * position + 1] = missing
+    return ''.join(pieces.ravel().tolist())
+
+def write_columns(sink: OutputSink, columns: ShapeColumns, indents: int = 2, compact: bool = False) -> None:
+    """ Writes a whole batch of shapes into the output sink in one write
+            parameters:
+                sink - OutputSink, the shared output of the html file
+                columns - ShapeColumns, the batch of shapes
+                indents - int, the number of indents in front of every line
+                compact - bool, writes the shapes with format_compact instead
+    """
+    sink.write(format_compact(columns, indents) if compact else format_lines(columns, indents), len(columns))
@@ -0,0 +1,10 @@
+from pyart.core import Shapes
+
+IDENTATION = "  "
+
+#the write_line() formats of a43's shape classes, with the columns that fill them in
+TEMPLATES: dict[int, tuple[str, tuple[str, ...]]] = {
+    Shapes.CIRCLE.value: ('<circle cx="{}" cy="{}" r="{}" fill="rgb({},{},{})" fill-opacity="{}"></circle>', ('x', 'y', 'rad', 'red', 'green', 'blue', 'opacity')),
+    Shapes.RECTANGLE.value: ('<rect x="{}" y="{}" width="{}" height="{}" style="fill:rgb({},{},{});fill-opacity:{}"></rect>', ('x', 'y', 'width', 'height', 'red', 'green', 'blue', 'opacity')),
+    Shapes.ELLIPSE.value: ('<ellipse cx="{}" cy="{}" rx="{}" ry="{}" style="fill:rgb({},{},{})"></ellipse>', ('x', 'y', 'rx', 'ry', 'red', 'green', 'blue')),
+}
@@ -0,0 +1,334 @@
+from typing import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+import os
+import struct
+import tempfile
+import zlib
+import numpy as np
+from pyart import Shapes
+from pyart.columns import ShapeColumns
+from spatial import bounds, bucket
+from pipeline import in_order
+
+WHITE: tuple[int, int, int, int] = (255, 255, 255, 255) #the page colour a browser draws the svg on
+PNG_SIGNATURE: bytes = b'\x89PNG\r\n\x1a\n'
+
+# STATIC FUNCTIONS
+def opacities(columns: ShapeColumns) -> np.ndarray:
+    """ Returns the opacity every shape is painted with, ellipses are written without a fill-opacity so they are opaque"""
+    return np.where(columns.shape == Shapes.ELLIPSE.value, 1.0, np.clip(columns.opacity, 0.0, 1.0)).astype(np.float32)
+
+def radii(columns: ShapeColumns) -> tuple[np.ndarray, np.ndarray]:
+    """ Returns the horizontal and vertical radius of every shape, a circle is an ellipse with both radii rad (rectangles get the rx and ry they do not use)"""
+    is_circle = columns.shape == Shapes.CIRCLE.value
+    return np.where(is_circle, columns.rad, columns.rx).astype(np.float64), np.where(is_circle, columns.rad, columns.ry).astype(np.float64)
+
+def box_rows(first_y: np.ndarray, last_y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ Returns (item, y) for every pixel row of every box, given the first and last (exclusive) row of each, box by box"""
+    rows = np.maximum(last_y - first_y, 0)
+    item = np.repeat(np.arange(len(first_y)), rows)
+    return item, first_y[item] + np.arange(len(item)) - np.repeat(np.cumsum(rows) - rows, rows)
+
+def runs(values: np.ndarray, pick) -> list[np.ndarray]:
+    """ Returns, for every level, pick (np.minimum or np.maximum) of every run of 2**level values along the rows of a 2D array
+        (any run is covered by the two runs of the largest level that fits, one at each end)"""
+    levels: list[np.ndarray] = [values]
+    while 2 ** len(levels) <= values.shape[1]:
+        half: int = 2 ** (len(levels) - 1)
+        levels.append(pick(levels[-1][:, :-half], levels[-1][:, half:]))
+    return levels
+
+def write_png(image: np.ndarray, path: str, level: int = 6, band: int = 256) -> None:
+    """ Writes an RGBA (or RGB) uint8 image of shape (height, width, channels) as a PNG file
+            parameters:
+                image - np.ndarray, the image, which may be a memory-mapped file
+                path - str, the name of the PNG file
+                level - int, the zlib compression level
+                band - int, the number of rows compressed at a time, so memory does not grow with the image
+    """
+    height, width, channels = image.shape
+    header: bytes = struct.pack('>IIBBBBB', width, height, 8, 6 if channels == 4 else 2, 0, 0, 0)
+    compressor = zlib.compressobj(level)
+    with open(path, 'wb') as file:
+        file.write(PNG_SIGNATURE + png_chunk(b'IHDR', header))
+        for top in range(0, height, band):
+            rows = image[top:top + band]
+            scanlines = np.zeros((len(rows), width * channels + 1), dtype=np.uint8) #every row starts with filter type 0
+            scanlines[:, 1:] = rows.reshape(len(rows), -1)
+            data: bytes = compressor.compress(scanlines.tobytes())
+            if data:
+                file.write(png_chunk(b'IDAT', data))
+        file.write(png_chunk(b'IDAT', compressor.flush()) + png_chunk(b'IEND', b''))
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    """ Returns one length-prefixed, CRC-checked PNG chunk"""
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+def save_image(image: np.ndarray, path: str, quality: int = 90) -> None:
+    """ Saves an RGBA uint8 image as PNG, or as JPEG when path ends in .jpg/.jpeg (which needs Pillow)"""
+    if path.lower().endswith(('.jpg', '.jpeg')):
+        try:
+            from PIL import Image
+        except ImportError:
+            raise ImportError('saving a JPEG needs Pillow (pip install pillow), save a .png instead') from None
+        Image.fromarray(np.asarray(image[..., :3])).save(path, quality=quality)
+        return
+    write_png(image, path)
+
+
+class Raster:
+    """ Class that composites shapes into an RGBA framebuffer, the same way a browser paints a43's svg"""
+
+    def __init__(self, width: int, height: int, scale: float = 1.0, background: tuple[int, int, int, int] = WHITE, origin: tuple[int, int] = (0, 0)) -> None:
+        """ Initalizes the class
+                parameters:
+                    width - int, width of the framebuffer in pixels
+                    height - int, height of the framebuffer in pixels
+                    scale - float, pixels per svg unit (below 1 renders a thumbnail)
+                    background - tuple, the RGBA colour the shapes are painted over
+                    origin - tuple, the pixel of the scaled canvas at the top left of the framebuffer (for rendering one tile)
+        """
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.origin = origin
+        #premultiplied colour and alpha in 0..1, painted in place
+        self.pixels = np.empty((height, width, 4), dtype=np.float32)
+        self.pixels[...] = np.array(background, dtype=np.float32) / 255
+        self.pixels[..., :3] *= self.pixels[..., 3:]
+
+    def spans(self, columns: ShapeColumns, shapes: np.ndarray, y: np.ndarray, box: tuple[np.ndarray, ...], is_rect: np.ndarray,
+              rx: np.ndarray, ry: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """ Returns the first and last (exclusive) pixel column each shape paints on a pixel row of its box, the one place a shape's pixels are worked out
+                parameters:
+                    columns - ShapeColumns, the shapes of the batch
+                    shapes - np.ndarray, the positions of the shapes, one per row
+                    y - np.ndarray, the pixel rows
+                    box - tuple, the first and last (exclusive) pixel column and row of every shape's box
+                    is_rect - np.ndarray, a boolean mask of the rectangles
+                    rx, ry - np.ndarray, the radii of every circle and ellipse (see radii)
+        """
+        first_x, last_x = box[0][shapes], box[1][shapes]
+        cx, rx, ry = columns.x[shapes], rx[shapes], ry[shapes]
+        dy = (y + self.origin[1] + 0.5) / self.scale - columns.y[shapes]
+        def inside(x: np.ndarray) -> np.ndarray:
+            """ returns whether the centre of pixel column x is inside the ellipse, multiplied out as spatial.covers does so a centre on the edge is exact"""
+            return (((x + self.origin[0] + 0.5) / self.scale - cx) * ry) ** 2 + (dy * rx) ** 2 <= (rx * ry) ** 2
+
+        #on a row the ellipse reaches half_width either side of its centre, the sqrt can be a pixel off at an edge so the pixels at the ends are checked
+        half_width = rx * np.sqrt(np.maximum(1 - (dy / ry) ** 2, 0)) * self.scale
+        centre = cx * self.scale - self.origin[0]
+        start = np.ceil(centre - half_width - 0.5)
+        start = np.where(inside(start - 1), start - 1, np.where(inside(start), start, start + 1))
+        end = np.floor(centre + half_width - 0.5) + 1
+        end = np.where(inside(end), end + 1, np.where(inside(end - 1), end, end - 1))
+        return (np.where(is_rect[shapes], first_x, np.clip(start, first_x, last_x)).astype(np.int64),
+                np.where(is_rect[shapes], last_x, np.clip(end, first_x, last_x)).astype(np.int64))
+
+    def draw(self, columns: ShapeColumns) -> None:
+        """ paints a batch of shapes over what is already drawn, in painter's order
+                parameters:
+                    columns - ShapeColumns, the shapes to paint
+        """
+        left, top, right, bottom = bounds(columns, self.scale)
+        left, right = left - self.origin[0], right - self.origin[0]
+        top, bottom = top - self.origin[1], bottom - self.origin[1]
+        alpha = opacities(columns)
+        #premultiplied colour and alpha, which an opaque shape paints as is
+        colours = np.ones((len(columns), 4), dtype=np.float32)
+        colours[:, :3] = np.stack([columns.red, columns.green, columns.blue], axis=1).astype(np.float32) / 255
+        is_rect = columns.shape == Shapes.RECTANGLE.value
+        rx, ry = radii(columns)
+
+        #only shapes whose box reaches a pixel centre inside the framebuffer are painted
+        box = (np.clip(np.ceil(left - 0.5), 0, self.width).astype(np.int64), np.clip(np.ceil(right - 0.5), 0, self.width).astype(np.int64),
+               np.clip(np.ceil(top - 0.5), 0, self.height).astype(np.int64), np.clip(np.ceil(bottom - 0.5), 0, self.height).astype(np.int64))
+        first_x, last_x, first_y, last_y = box
+        visible = (first_x < last_x) & (first_y < last_y) & (alpha > 0)
+        owner, hidden = self.occlusion(columns, box, visible, visible & (alpha >= 1), is_rect, rx, ry)
+
+        #the spans of every row of the shapes left to paint are worked out at once, row_start[n] is the first row of the nth shape
+        shown = np.flatnonzero(visible & ~hidden)
+        item, y = box_rows(first_y[shown], last_y[shown])
+        with np.errstate(divide='ignore', invalid='ignore'): #rectangles have no radii, their spans are their boxes
+            starts, ends = self.spans(columns, shown[item], y, box, is_rect, rx, ry)
+        row_start = np.cumsum(last_y[shown] - first_y[shown]) - (last_y[shown] - first_y[shown])
+
+        for index, row in zip(shown.tolist(), row_start.tolist()):
+            x0, x1, y0, y1 = first_x[index], last_x[index], first_y[index], last_y[index]
+            region = self.pixels[y0:y1, x0:x1]
+            #a pixel a later opaque shape paints over is left as it is
+            coverage = owner[y0:y1, x0:x1] <= index
+            if not is_rect[index]:
+                x = np.arange(x0, x1)
+                coverage &= (x >= starts[row:row + y1 - y0, None]) & (x < ends[row:row + y1 - y0, None])
+
+            #an opaque shape paints its colour as is, so whatever it covers can be skipped (see occlusion)
+            if alpha[index] >= 1:
+                region[coverage] = colours[index]
+                continue
+            #otherwise the over operator on premultiplied pixels: out = colour * a + out * (1 - a), which leaves a pixel of weight 0 as it is,
+            #so the covered pixels are picked out only when that is less work than weighting the whole box
+            covered: int = np.count_nonzero(coverage)
+            if covered == coverage.size:
+                region += alpha[index] * (colours[index] - region)
+            elif covered * 2 < coverage.size:
+                pixels = region[coverage]
+                region[coverage] = pixels + alpha[index] * (colours[index] - pixels)
+            else:
+                region += (coverage * alpha[index])[..., None] * (colours[index] - region)
+
+    def occlusion(self, columns: ShapeColumns, box: tuple[np.ndarray, ...], visible: np.ndarray, opaque: np.ndarray, is_rect: np.ndarray,
+                  rx: np.ndarray, ry: np.ndarray, band: int = 64) -> tuple[np.ndarray, np.ndarray]:
+        """ Finds the last opaque shape that paints every pixel, and the shapes that paint no pixel after it, so skipping those changes nothing
+                parameters:
+                    columns - ShapeColumns, the shapes of the batch
+                    box - tuple, the first and last (exclusive) pixel column and row of every shape's box
+                    visible - np.ndarray, a boolean mask of the shapes that reach a pixel of the framebuffer
+                    opaque - np.ndarray, a boolean mask of the visible shapes that paint over whatever is under them
+                    is_rect - np.ndarray, a boolean mask of the rectangles
+                    rx, ry - np.ndarray, the radii of every circle and ellipse (see radii)
+                    band - int, the number of framebuffer rows done at a time, which bounds the memory of the row spans
+                returns:
+                    tuple, (owner, hidden) the index of the last opaque shape over every pixel (-1 for none) and a boolean mask of the hidden shapes
+        """
+        first_x, last_x, first_y, last_y = box
+        owner = np.full((self.height, self.width), -1, dtype=np.int32)
+        if not opaque.any():
+            return owner, np.zeros(len(columns), dtype=bool)
+        #the earliest last opaque shape over the pixels each shape paints, a shape painted before it shows nowhere
+        earliest = np.full(len(columns), len(columns), dtype=np.int64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for top in range(0, self.height, band):
+                bottom: int = min(top + band, self.height)
+                in_band = (first_y < bottom) & (last_y > top)
+                rows = (np.maximum(first_y, top), np.minimum(last_y, bottom))
+
+                #every opaque span raises the largest index of the two runs that cover it, which are then spread down to the single pixels
+                shapes = np.flatnonzero(opaque & in_band)
+                item, y = box_rows(rows[0][shapes], rows[1][shapes])
+                shape = shapes[item]
+                start, end = self.spans(columns, shape, y, box, is_rect, rx, ry)
+                level = np.frexp(end - start)[1] - 1
+                largest = [np.full((bottom - top, self.width - 2 ** size + 1), -1, dtype=np.int64) for size in range(self.width.bit_length())]
+                for size, run in enumerate(largest):
+                    pick = (level == size) & (start < end)
+                    np.maximum.at(run, (y[pick] - top, start[pick]), shape[pick])
+                    np.maximum.at(run, (y[pick] - top, end[pick] - 2 ** size), shape[pick])
+                for size in range(len(largest) - 1, 0, -1):
+                    run, below, half = largest[size], largest[size - 1], 2 ** (size - 1)
+                    np.maximum(below[:, :run.shape[1]], run, out=below[:, :run.shape[1]])
+                    np.maximum(below[:, half:half + run.shape[1]], run, out=below[:, half:half + run.shape[1]])
+                owner[top:bottom] = largest[0]
+
+                #the smallest owner over the span of every row of every shape
+                shapes = np.flatnonzero(visible & in_band)
+                item, y = box_rows(rows[0][shapes], rows[1][shapes])
+                shape = shapes[item]
+                start, end = self.spans(columns, shape, y, box, is_rect, rx, ry)
+                level = np.frexp(end - start)[1] - 1
+                for size, smallest in enumerate(runs(owner[top:bottom], np.minimum)):
+                    pick = (level == size) & (start < end)
+                    lowest = np.minimum(smallest[y[pick] - top, start[pick]], smallest[y[pick] - top, end[pick] - 2 ** size])
+                    np.minimum.at(earliest, shape[pick], lowest)
+        return owner, visible & (earliest > np.arange(len(columns)))
+
+    def image(self) -> np.ndarray:
+        """ returns the framebuffer as an RGBA uint8 image"""
+        alpha = self.pixels[..., 3:]
+        colour = np.divide(self.pixels[..., :3], alpha, out=np.zeros_like(self.pixels[..., :3]), where=alpha > 0)
+        return np.rint(np.concatenate([colour, alpha], axis=2) * 255).astype(np.uint8)
+
+    def save(self, path: str) -> None:
+        """ saves the framebuffer as a PNG or JPEG file"""
+        save_image(self.image(), path)
+
+
+def rasterize(chunks: Iterable[ShapeColumns], canvas_width: int, canvas_height: int, scale: float = 1.0, background: tuple[int, int, int, int] = WHITE) -> np.ndarray:
+    """ Paints every chunk of shapes onto one canvas
+            parameters:
+                chunks - Iterable[ShapeColumns], the shapes in painter's order (usually from pipeline.generate_shapes)
+                canvas_width - int, width of the svg canvas
+                canvas_height - int, height of the svg canvas
+                scale - float, pixels per svg unit
+                background - tuple, the RGBA colour the shapes are painted over
+            returns:
+                np.ndarray, the RGBA uint8 image
+    """
+    raster = Raster(max(1, round(canvas_width * scale)), max(1, round(canvas_height * scale)), scale, background)
+    for chunk in chunks:
+        raster.draw(chunk)
+    return raster.image()
+
+
+def tile_buckets(columns: ShapeColumns, scale: float, tile_size: int, tiles_x: int, tiles_y: int) -> tuple[np.ndarray, np.ndarray]:
+    """ Sorts the shapes into the tiles their bounding boxes overlap
+            parameters:
+                columns - ShapeColumns, the shapes in painter's order
+                scale - float, pixels per svg unit
+                tile_size - int, width and height of a tile in pixels
+                tiles_x - int, the number of tile columns
+                tiles_y - int, the number of tile rows
+            returns:
+                tuple, (shapes, starts) where the shapes of tile t (numbered row by row) are shapes[starts[t]:starts[t + 1]], in painter's order
+    """
+    left, top, right, bottom = bounds(columns, scale)
+    first_x = np.clip(np.floor(left / tile_size), 0, tiles_x - 1).astype(np.int64)
+    last_x = np.clip(np.floor(right / tile_size), 0, tiles_x - 1).astype(np.int64)
+    first_y = np.clip(np.floor(top / tile_size), 0, tiles_y - 1).astype(np.int64)
+    last_y = np.clip(np.floor(bottom / tile_size), 0, tiles_y - 1).astype(np.int64)
+    inside = (right >= 0) & (bottom >= 0) & (left < tiles_x * tile_size) & (top < tiles_y * tile_size)
+    return bucket(first_x, last_x, first_y, last_y, tiles_x, tiles_y, inside)
+
+def render_tile(columns: ShapeColumns, output: str, origin: tuple[int, int], size: tuple[int, int], scale: float, background: tuple[int, int, int, int]) -> None:
+    """ Paints the shapes of one tile and copies the tile into the memory-mapped image, the unit of work of a worker process"""
+    raster = Raster(size[0], size[1], scale, background, origin)
+    raster.draw(columns)
+    image = np.load(output, mmap_mode='r+')
+    image[origin[1]:origin[1] + size[1], origin[0]:origin[0] + size[0]] = raster.image()
+    image.flush()
+
+def tile_calls(columns: ShapeColumns, shapes: np.ndarray, starts: np.ndarray, output: str, image_size: tuple[int, int], scale: float, tile_size: int,
+               background: tuple[int, int, int, int]) -> Iterator[tuple]:
+    """ Hands out the render_tile call of every tile (see tile_buckets for shapes and starts), copying the shapes of a tile out of columns only when its call is taken"""
+    width, height = image_size
+    tiles_x: int = -(-width // tile_size)
+    for tile in range(tiles_x * -(-height // tile_size)):
+        origin: tuple[int, int] = (tile % tiles_x * tile_size, tile // tiles_x * tile_size)
+        size: tuple[int, int] = (min(tile_size, width - origin[0]), min(tile_size, height - origin[1]))
+        yield render_tile, columns.take(shapes[starts[tile]:starts[tile + 1]]), output, origin, size, scale, background
+
+def render_tiled(chunks: Iterable[ShapeColumns], canvas_width: int, canvas_height: int, path: str, scale: float = 1.0, tile_size: int = 1024,
+                 workers: int = 1, background: tuple[int, int, int, int] = WHITE, framebuffer: str | None = None) -> None:
+    """ Paints a canvas tile by tile into a memory-mapped image and saves it, so no full float framebuffer is ever held
+        (the shapes are held once, as one batch, and only the tiles in flight hold copies of theirs)
+            parameters:
+                chunks - Iterable[ShapeColumns], the shapes in painter's order
+                canvas_width - int, width of the svg canvas
+                canvas_height - int, height of the svg canvas
+                path - str, the .png (or .jpg) file to save
+                scale - float, pixels per svg unit
+                tile_size - int, width and height of a tile in pixels
+                workers - int, the number of processes painting tiles
+                background - tuple, the RGBA colour the shapes are painted over
+                framebuffer - str, a .npy file to keep the RGBA image in (a temporary file if None)
+    """
+    width, height = max(1, round(canvas_width * scale)), max(1, round(canvas_height * scale))
+    tiles_x, tiles_y = -(-width // tile_size), -(-height // tile_size)
+    columns: ShapeColumns = ShapeColumns.concat(list(chunks))
+    shapes, starts = tile_buckets(columns, scale, tile_size, tiles_x, tiles_y)
+
+    output: str | None = framebuffer
+    if output is None:
+        handle, output = tempfile.mkstemp(suffix='.npy')
+        os.close(handle) #open_memmap and the workers open the file by name
+    np.lib.format.open_memmap(output, mode='w+', dtype=np.uint8, shape=(height, width, 4)).flush()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            #at most two tiles per worker are in flight, so only their copies of the shapes are held at once
+            for _ in in_order(pool, tile_calls(columns, shapes, starts, output, (width, height), scale, tile_size, background), 2 * workers):
+                pass
+        save_image(np.load(output, mmap_mode='r'), path)
+    finally:
+        if framebuffer is None:
+            os.remove(output)
@@ -0,0 +1,101 @@
+from typing import NamedTuple
+from concurrent.futures import ProcessPoolExecutor, Future, as_completed
+import argparse
+import json
+import os
+import sys
+import time
+from a43 import RenderJob, load_jobs, render
+
+class JobResult(NamedTuple):
+    """class for the outcome of one rendered document"""
+    file: str
+    shapes: int
+    bytes: int
+    seconds: float
+    error: str | None = None
+
+# STATIC FUNCTIONS
+def read_manifest(path: str) -> list[RenderJob]:
+    """ Reads the jobs of a manifest, a JSON lines file (one job per line) or anything load_jobs reads"""
+    if not path.endswith('.jsonl'):
+        return load_jobs(path)
+    with open(path) as file:
+        return [RenderJob.from_dict(json.loads(line)) for line in file if line.strip()]
+
+def timed_render(job: RenderJob, cache: str | None = None) -> JobResult:
+    """ Renders one job (through the render cache in the directory cache, if given) and times it, the unit of work of a worker process"""
+    start: float = time.perf_counter()
+    try:
+        if cache:
+            from cache import RenderCache
+            shapes: int = RenderCache(cache).render(job)
+        else:
+            shapes = render(job)
+    except Exception as error:
+        return JobResult(job.file, 0, 0, time.perf_counter() - start, f'{type(error).__name__}: {error}')
+    return JobResult(job.file, shapes, os.path.getsize(job.file), time.perf_counter() - start)
+
+def run(jobs: list[RenderJob], workers: int = os.cpu_count() or 1, cache: str | None = None) -> list[JobResult]:
+    """ Renders every job with a pool of at most workers processes and prints a line for each as it finishes
+            parameters:
+                jobs - list[RenderJob], the documents to render
+                workers - int, the number of worker processes
+                cache - str, the directory of a render cache shared by the workers (None renders every job)
+            returns:
+                list[JobResult], the results in the order the jobs finished
+    """
+    results: list[JobResult] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures: list[Future] = [pool.submit(timed_render, job, cache) for job in jobs]
+        for future in as_completed(futures):
+            result: JobResult = future.result()
+            results.append(result)
+            if result.error:
+                print(f'FAILED {result.file}: {result.error}', file=sys.stderr)
+            else:
+                print(f'{result.file}: {result.shapes} shapes, {result.bytes} bytes in {result.seconds:.3f}s ({result.shapes / max(result.seconds, 1e-9):,.0f} shapes/s)')
+    return results
+
+def summary(results: list[JobResult], seconds: float) -> dict:
+    """ Returns the totals and throughput of a run that took seconds of wall time"""
+    shapes: int = sum(result.shapes for result in results)
+    written: int = sum(result.bytes for result in results)
+    return {
+        'jobs': len(results),
+        'failed': sum(1 for result in results if result.error),
+        'shapes': shapes,
+        'bytes': written,
+        'seconds': seconds,
+        'jobs_per_second': len(results) / seconds if seconds else 0.0,
+        'shapes_per_second': shapes / seconds if seconds else 0.0,
+        'bytes_per_second': written / seconds if seconds else 0.0,
+        'results': [result._asdict() for result in results],
+    }
+
+def main() -> None:
+    """main method"""
+    parser = argparse.ArgumentParser(description="Renders every document of a manifest with a pool of processes")
+    parser.add_argument("manifest", help="JSON, JSON lines or TOML file of jobs (see a43.RenderJob.from_dict)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of documents rendered at the same time")
+    parser.add_argument("--report", help="file the JSON summary of the run is written to")
+    parser.add_argument("--cache", metavar='DIR', help="directory of a render cache, jobs rendered before are copied from there")
+    args = parser.parse_args()
+
+    try:
+        jobs: list[RenderJob] = read_manifest(args.manifest)
+    except ValueError as error:
+        parser.error(str(error))
+
+    start: float = time.perf_counter()
+    results: list[JobResult] = run(jobs, args.workers, args.cache)
+    report: dict = summary(results, time.perf_counter() - start)
+    print(f'{report["jobs"]} jobs ({report["failed"]} failed), {report["shapes"]} shapes in {report["seconds"]:.3f}s: '
+          f'{report["jobs_per_second"]:.1f} jobs/s, {report["shapes_per_second"]:,.0f} shapes/s, {report["bytes_per_second"] / 1e6:.1f} MB/s')
+    if args.report:
+        with open(args.report, 'w') as file:
+            json.dump(report, file, indent=2)
+    sys.exit(1 if report['failed'] else 0)
+
+if __name__ == "__main__":
+    main()
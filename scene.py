@@ -0,0 +1,177 @@
+from typing import IO, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+import json
+import struct
+import numpy as np
+from pyart.columns import ShapeColumns
+from pipeline import CHUNK_SIZE, Fragment, cull, format_chunk, in_order, prune, serialize
+from instrument import Metrics
+
+MAGIC: bytes = b'PYSCENE1'
+ALIGNMENT: int = 64 #every column starts on a multiple of this many bytes, so a memory map of it is aligned
+OPACITY_DTYPE = np.dtype('<i2') #opacities are stored as whole hundredths, which is all gen_floats generates
+
+class Scene:
+    """ Class that reads a scene file: a header and one typed column per ShapeColumns field, memory-mapped so only the shapes in use are read"""
+
+    def __init__(self, path: str) -> None:
+        """ Initalizes the class
+                parameters:
+                    path - str, the name of the scene file (see SceneWriter)
+                raises:
+                    ValueError, if the file is not a scene file
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{path}: not a scene file')
+            (length,) = struct.unpack('<I', file.read(4))
+            header: dict = json.loads(file.read(length))
+        self.count: int = header['count']
+        self.canvas_width: int = header['canvas_width']
+        self.canvas_height: int = header['canvas_height']
+        self.__columns: dict[str, np.ndarray] = {
+            name: np.memmap(path, dtype=np.dtype(dtype), mode='r', offset=offset, shape=(self.count,)) if self.count else np.empty(0, dtype=np.dtype(dtype))
+            for name, (dtype, offset) in header['columns'].items()
+        }
+
+    def __len__(self) -> int:
+        """ returns the number of shapes in the scene"""
+        return self.count
+
+    def columns(self, start: int = 0, stop: int | None = None) -> ShapeColumns:
+        """ returns the shapes from start up to stop, as views of the file except for the decoded opacities"""
+        columns: dict[str, np.ndarray] = {name: column[start:stop] for name, column in self.__columns.items()}
+        columns['opacity'] = columns['opacity'] / 100
+        return ShapeColumns(**columns)
+
+    def chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[ShapeColumns]:
+        """ Lazily reads the scene at most chunk_size shapes at a time, in painter's order"""
+        for start in range(0, self.count, chunk_size):
+            yield self.columns(start, start + chunk_size)
+
+
+class SceneWriter:
+    """ Class that writes chunks of shapes into a scene file, straight into the column of every field"""
+
+    def __init__(self, path: str, count: int, canvas_width: int, canvas_height: int, dtypes: dict[str, np.dtype]) -> None:
+        """ Initalizes the class
+                parameters:
+                    path - str, the name of the scene file
+                    count - int, the number of shapes the scene will hold
+                    canvas_width - int, width of the svg canvas
+                    canvas_height - int, height of the svg canvas
+                    dtypes - dict, the dtype of every ShapeColumns field but opacity
+        """
+        self.count = count
+        self.__written: int = 0
+        self.__dtypes: dict[str, np.dtype] = {name: np.dtype(dtypes[name]).newbyteorder('<') for name in ShapeColumns._fields if name != 'opacity'}
+        self.__dtypes['opacity'] = OPACITY_DTYPE
+
+        #the header is sized first so the columns can be laid out after it
+        columns: dict[str, list] = {name: [dtype.str, 0] for name, dtype in self.__dtypes.items()}
+        header: dict = {'count': count, 'canvas_width': canvas_width, 'canvas_height': canvas_height, 'columns': columns}
+        offset: int = align(len(MAGIC) + 4 + len(json.dumps(header)) + len(columns) * 24)
+        for name, dtype in self.__dtypes.items():
+            columns[name][1] = offset
+            offset = align(offset + count * dtype.itemsize)
+        self.__offsets: dict[str, int] = {name: offset for name, (_, offset) in columns.items()}
+
+        data: bytes = json.dumps(header).encode()
+        self.__file: IO = open(path, 'wb')
+        self.__file.write(MAGIC + struct.pack('<I', len(data)) + data)
+        self.__file.truncate(offset)
+
+    def __enter__(self) -> "SceneWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, columns: ShapeColumns) -> None:
+        """ writes the next chunk of shapes into every column
+                parameters:
+                    columns - ShapeColumns, the shapes, in painter's order after the ones already written
+                raises:
+                    ValueError, if the chunk does not fit the scene or its values do not fit the dtypes of the columns
+        """
+        if self.__written + len(columns) > self.count:
+            raise ValueError(f'the scene holds {self.count} shapes, {self.__written + len(columns)} were written')
+        hundredths = np.rint(columns.opacity * 100)
+        if hundredths.size and (hundredths.min() < np.iinfo(OPACITY_DTYPE).min or hundredths.max() > np.iinfo(OPACITY_DTYPE).max):
+            raise ValueError('opacity: out of the range a scene file stores')
+        for name, dtype in self.__dtypes.items():
+            column = hundredths if name == 'opacity' else getattr(columns, name)
+            if name != 'opacity' and not np.can_cast(column.dtype, dtype):
+                raise ValueError(f'{name}: {column.dtype} values do not fit the {dtype} column of the scene')
+            self.__file.seek(self.__offsets[name] + self.__written * dtype.itemsize)
+            self.__file.write(column.astype(dtype, copy=False).tobytes())
+        self.__written += len(columns)
+
+    def close(self) -> None:
+        """ closes the file, closing twice does nothing"""
+        self.__file.close()
+
+# STATIC FUNCTIONS
+def align(offset: int) -> int:
+    """ returns offset rounded up to the next multiple of ALIGNMENT"""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def write_scene(path: str, chunks: Iterable[ShapeColumns], count: int, canvas_width: int, canvas_height: int) -> int:
+    """ Writes chunks of shapes into a scene file one chunk at a time
+            parameters:
+                path - str, the name of the scene file
+                chunks - Iterable[ShapeColumns], the shapes in painter's order (usually from pipeline.generate_shapes), the columns take the dtypes of the first chunk
+                count - int, the total number of shapes in chunks
+                canvas_width - int, width of the svg canvas
+                canvas_height - int, height of the svg canvas
+            returns:
+                int, the number of shapes written
+    """
+    chunks = iter(chunks)
+    first: ShapeColumns | None = next(chunks, None)
+    dtypes: dict[str, np.dtype] = {name: np.dtype(np.int64) if first is None else getattr(first, name).dtype for name in ShapeColumns._fields}
+    written: int = 0
+    with SceneWriter(path, count, canvas_width, canvas_height, dtypes) as writer:
+        if first is not None:
+            writer.write(first)
+            written += len(first)
+        for chunk in chunks:
+            writer.write(chunk)
+            written += len(chunk)
+    if written != count:
+        raise ValueError(f'the scene holds {count} shapes, {written} were written')
+    return written
+
+def render_scene_chunk(path: str, start: int, stop: int, index: int, indents: int = 2, viewport: tuple[int, int] | None = None, compact: bool = False) -> Fragment:
+    """ Reads and serializes one chunk of a scene file, the unit of work of a worker process"""
+    chunk: ShapeColumns = cull(Scene(path).columns(start, stop), viewport)
+    return Fragment(format_chunk(chunk, index, indents, compact), len(chunk))
+
+def render_scene(path: str, workers: int = 1, chunk_size: int = CHUNK_SIZE, indents: int = 2, viewport: tuple[int, int] | None = None,
+                 pruned: bool = False, compact: bool = False, first_index: int = 0, metrics: Metrics | None = None) -> Iterator[Fragment]:
+    """ Lazily serializes the shapes of a scene file, in order, using a pool of worker processes
+            parameters:
+                path - str, the name of the scene file
+                workers - int, the number of worker processes (1 renders in this process)
+                chunk_size - int, the largest number of shapes in one chunk
+                indents - int, the number of indents in front of every line
+                viewport - tuple, the (width, height) of the canvas, shapes entirely outside it are left out (None keeps every shape)
+                pruned - bool, leaves out the shapes hidden under later opaque shapes, which needs the whole scene so it renders in this process
+                compact - bool, writes the shapes with serialize.format_compact
+                first_index - int, the index of the first chunk, which names its css classes
+                metrics - Metrics, times the chunks read in this process as the read stage and pruning as the prune stage
+    """
+    scene: Scene = Scene(path)
+    chunks: Iterator[ShapeColumns] = scene.chunks(chunk_size) if metrics is None else metrics.timed(scene.chunks(chunk_size), 'read')
+    if pruned:
+        chunks = prune(chunks, chunk_size)
+        yield from serialize(chunks if metrics is None else metrics.timed(chunks, 'prune'), indents, viewport, compact, first_index)
+        return
+    if workers <= 1:
+        yield from serialize(chunks, indents, viewport, compact, first_index)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        calls = ((render_scene_chunk, path, start, min(start + chunk_size, len(scene)), index, indents, viewport, compact)
+                 for index, start in enumerate(range(0, len(scene), chunk_size), start=first_index))
+        yield from in_order(pool, calls, 2 * workers)
@@ -0,0 +1,289 @@
+from typing import NamedTuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from pyart import OutputSink
+from a43 import RenderJob, HtmlDoc
+
+MAX_BODY: int = 1 << 20 #largest request body read, a job description is a few hundred bytes
+MAX_SHAPES: int = 10_000_000
+REQUEST_TIMEOUT: float = 30.0 #seconds a client gets to send its whole request
+#job options that write files next to the document or need the whole scene before the first shape, neither of which a stream can do
+UNSTREAMABLE: tuple[str, ...] = ('raster', 'tile_size', 'scene', 'from_scene', 'append', 'compress', 'prune')
+REASONS: dict[int, str] = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 408: 'Request Timeout',
+                           413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+class HttpError(Exception):
+    """ class for a request that is answered with an error status instead of a document"""
+    def __init__(self, status: int, message: str) -> None:
+        """ Initalizes the class
+                parameters:
+                    status - int, the http status of the answer
+                    message - str, why the request was refused
+        """
+        super().__init__(message)
+        self.status = status
+
+class Request(NamedTuple):
+    """class for one parsed http request"""
+    method: str
+    path: str
+    headers: dict[str, str]
+    body: bytes
+
+# STATIC FUNCTIONS
+async def read_request(reader: asyncio.StreamReader) -> Request:
+    """ Reads one http request
+            parameters:
+                reader - asyncio.StreamReader, the connection of the client
+            raises:
+                HttpError, if the request is malformed or its body is larger than MAX_BODY
+    """
+    try:
+        head: bytes = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.LimitOverrunError:
+        raise HttpError(400, 'request head too large') from None
+    except asyncio.IncompleteReadError:
+        raise HttpError(400, 'incomplete request') from None
+    lines: list[str] = head.decode('latin-1').split('\r\n')
+    try:
+        method, path, _ = lines[0].split(' ')
+    except ValueError:
+        raise HttpError(400, 'malformed request line') from None
+    headers: dict[str, str] = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    try:
+        length: int = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HttpError(400, 'malformed content-length') from None
+    if length > MAX_BODY:
+        raise HttpError(413, f'request body larger than {MAX_BODY} bytes')
+    try:
+        body: bytes = await reader.readexactly(length) if length else b''
+    except asyncio.IncompleteReadError:
+        raise HttpError(400, 'incomplete request body') from None
+    return Request(method, path.split('?', 1)[0], headers, body)
+
+def job_from_body(body: bytes, max_shapes: int = MAX_SHAPES) -> RenderJob:
+    """ Returns the job described by the JSON body of a render request
+            parameters:
+                body - bytes, a JSON object read by RenderJob.from_dict (num_shapes, canvas_width, canvas_height, seed, the shape constraints ...)
+                max_shapes - int, the most shapes one request may ask for
+            raises:
+                HttpError, if the body is not a job that can be streamed
+    """
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError as error:
+        raise HttpError(400, f'body is not JSON: {error}') from None
+    if not isinstance(data, dict):
+        raise HttpError(400, 'body must be a JSON object')
+    refused: list[str] = [key for key in UNSTREAMABLE if data.get(key)]
+    if refused:
+        raise HttpError(400, f'{", ".join(refused)}: not available when streaming')
+    try:
+        job: RenderJob = RenderJob.from_dict(data)
+    except (ValueError, TypeError) as error:
+        raise HttpError(400, str(error)) from None
+    if job.num_shapes > max_shapes:
+        raise HttpError(413, f'num_shapes: at most {max_shapes} per request')
+    return job
+
+def document(job: RenderJob) -> tuple[str, str]:
+    """ returns the text HtmlDoc writes before and after the shapes of job, so a streamed page is identical to the rendered file"""
+    buffer: io.StringIO = io.StringIO()
+    doc: HtmlDoc = HtmlDoc(file=job.file, title=job.title, canvas_width=job.canvas_width, canvas_height=job.canvas_height, sink=OutputSink(buffer), compact=job.compact)
+    header: str = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    doc.end_body()
+    return header, buffer.getvalue()
+
+def head(status: int, headers: dict[str, str]) -> bytes:
+    """ returns the status line and headers of a response"""
+    lines: list[str] = [f'HTTP/1.1 {status} {REASONS[status]}'] + [f'{name}: {value}' for name, value in headers.items()]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+class RenderService:
+    """ Class for a local http service that streams rendered documents chunk by chunk, generating the chunks on a shared pool of processes"""
+
+    def __init__(self, workers: int = os.cpu_count() or 1, max_renders: int = 4, max_shapes: int = MAX_SHAPES) -> None:
+        """ Initalizes the class
+                parameters:
+                    workers - int, the number of processes that generate and serialize chunks for every request together
+                    max_renders - int, the most documents streamed at once, further render requests are refused with 503
+                    max_shapes - int, the most shapes one request may ask for
+        """
+        self.workers = workers
+        self.max_renders = max_renders
+        self.max_shapes = max_shapes
+        self.__renders: asyncio.Semaphore = asyncio.Semaphore(max_renders)
+        self.__pool: ProcessPoolExecutor | None = None
+        self.active: int = 0
+        self.served: int = 0
+        self.refused: int = 0
+        self.failed: int = 0
+        self.shapes: int = 0
+
+    def stats(self) -> dict:
+        """ returns the counters of the service"""
+        return {'active': self.active, 'served': self.served, 'refused': self.refused, 'failed': self.failed, 'shapes': self.shapes,
+                'workers': self.workers, 'max_renders': self.max_renders, 'max_shapes': self.max_shapes}
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8000) -> asyncio.Server:
+        """ Starts the worker processes and listens for requests
+                parameters:
+                    host - str, the address to listen on
+                    port - int, the port to listen on (0 picks a free one)
+                returns:
+                    asyncio.Server, the listening server
+        """
+        from pipeline import render_chunk #imported before the workers start, so every worker inherits it
+        self.__pool = ProcessPoolExecutor(max_workers=self.workers)
+        await asyncio.get_running_loop().run_in_executor(self.__pool, int) #starts the workers now rather than during the first request
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self) -> None:
+        """ stops the worker processes, dropping the chunks nobody waits for any more"""
+        if self.__pool is not None:
+            self.__pool.shutdown(wait=False, cancel_futures=True)
+            self.__pool = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ Answers one request on a connection, then closes it
+                parameters:
+                    reader - asyncio.StreamReader, what the client sends
+                    writer - asyncio.StreamWriter, what is sent back to the client
+        """
+        start: float = time.perf_counter()
+        request: Request | None = None
+        status: int = 200
+        shapes: int = 0
+        try:
+            try:
+                request = await asyncio.wait_for(read_request(reader), REQUEST_TIMEOUT)
+                if request.path == '/health':
+                    await self.respond(writer, 200, self.stats())
+                elif request.path != '/render':
+                    raise HttpError(404, f'{request.path}: not found, POST a job to /render')
+                elif request.method != 'POST':
+                    raise HttpError(405, 'POST a job to /render')
+                else:
+                    job: RenderJob = job_from_body(request.body, self.max_shapes)
+                    if self.__renders.locked():
+                        self.refused += 1
+                        raise HttpError(503, f'already streaming {self.max_renders} documents, try again later')
+                    async with self.__renders:
+                        shapes = await self.stream(job, writer)
+            except HttpError as error:
+                status = error.status
+                await self.respond(writer, status, {'error': str(error)})
+            except asyncio.TimeoutError:
+                status = 408
+                await self.respond(writer, status, {'error': f'request not received within {REQUEST_TIMEOUT:g}s'})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            status = 0 #the client went away, the chunks it no longer waits for were cancelled
+            self.failed += 1
+        finally:
+            writer.close()
+        if request is not None:
+            print(f'{request.method} {request.path} {status or "closed"} {shapes} shapes {time.perf_counter() - start:.3f}s', file=sys.stderr)
+
+    async def respond(self, writer: asyncio.StreamWriter, status: int, body: dict) -> None:
+        """ sends a whole JSON response"""
+        data: bytes = json.dumps(body).encode()
+        writer.write(head(status, {'Content-Type': 'application/json', 'Content-Length': str(len(data)), 'Connection': 'close'}) + data)
+        await writer.drain()
+
+    async def stream(self, job: RenderJob, writer: asyncio.StreamWriter) -> int:
+        """ Streams a document as it is rendered, the page head right away and then every chunk in order as soon as it and the ones before it are done
+                parameters:
+                    job - RenderJob, the document to render
+                    writer - asyncio.StreamWriter, the connection of the client
+                returns:
+                    int, the number of shapes sent
+        """
+        from pipeline import CHUNK_SIZE, render_chunk, root_entropy
+        loop = asyncio.get_running_loop()
+        entropy: int = root_entropy(job.seed)
+        viewport: tuple[int, int] | None = (job.canvas_width, job.canvas_height) if job.cull else None
+        header, trailer = document(job)
+        self.active += 1
+        try:
+            writer.write(head(200, {'Content-Type': 'text/html; charset=utf-8', 'Transfer-Encoding': 'chunked', 'Connection': 'close'}))
+            await self.send(writer, header)
+
+            #like pipeline.in_order, at most two chunks per worker are in flight so a slow client holds back the workers, not memory
+            pending: deque[asyncio.Future] = deque()
+            shapes: int = 0
+            try:
+                for index, start in enumerate(range(0, job.num_shapes, CHUNK_SIZE)):
+                    pending.append(loop.run_in_executor(self.__pool, render_chunk, job.config, min(CHUNK_SIZE, job.num_shapes - start), job.shape_type,
+                                                        entropy, index, 0 if job.compact else 2, viewport, job.compact))
+                    if len(pending) >= 2 * self.workers:
+                        fragment = await pending.popleft()
+                        await self.send(writer, fragment.text)
+                        shapes += fragment.shapes
+                while pending:
+                    fragment = await pending.popleft()
+                    await self.send(writer, fragment.text)
+                    shapes += fragment.shapes
+            finally:
+                for future in pending:
+                    future.cancel()
+
+            await self.send(writer, trailer)
+            writer.write(b'0\r\n\r\n')
+            await writer.drain()
+        finally:
+            self.active -= 1
+        self.served += 1
+        self.shapes += shapes
+        return shapes
+
+    async def send(self, writer: asyncio.StreamWriter, text: str) -> None:
+        """ sends text as one chunk of a chunked response, waiting while the client is behind"""
+        if not text:
+            return #an empty chunk would end the response
+        data: bytes = text.encode('utf-8')
+        writer.writelines((f'{len(data):x}\r\n'.encode(), data, b'\r\n'))
+        await writer.drain()
+
+async def serve(host: str, port: int, workers: int, max_renders: int, max_shapes: int) -> None:
+    """ runs a RenderService until the process is stopped"""
+    service: RenderService = RenderService(workers, max_renders, max_shapes)
+    server: asyncio.Server = await service.start(host, port)
+    address = server.sockets[0].getsockname()
+    print(f'streaming documents on http://{address[0]}:{address[1]}/render with {workers} workers', file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def main() -> None:
+    """main method"""
+    parser = argparse.ArgumentParser(description="Serves a43 documents over http, streaming each page chunk by chunk as its shapes are generated")
+    parser.add_argument("--host", default='127.0.0.1', help="address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of processes that generate and serialize chunks")
+    parser.add_argument("--max-renders", type=int, default=4, help="most documents streamed at once, more are refused with 503")
+    parser.add_argument("--max-shapes", type=int, default=MAX_SHAPES, help="most shapes one request may ask for")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_renders, args.max_shapes))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import numpy as np
+from pyart import Shapes
+from pyart.columns import ShapeColumns
+
+# STATIC FUNCTIONS
+def bounds(columns: ShapeColumns, scale: float = 1.0) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """ Returns the left, top, right and bottom edge of every shape's bounding box, in pixels of a canvas scaled by scale"""
+    x = columns.x.astype(np.float64)
+    y = columns.y.astype(np.float64)
+    is_circle = columns.shape == Shapes.CIRCLE.value
+    is_rect = columns.shape == Shapes.RECTANGLE.value
+
+    #circles and ellipses are centred on x, y while rectangles start there
+    half_width = np.where(is_circle, columns.rad, columns.rx).astype(np.float64)
+    half_height = np.where(is_circle, columns.rad, columns.ry).astype(np.float64)
+    left = np.where(is_rect, x, x - half_width)
+    top = np.where(is_rect, y, y - half_height)
+    right = np.where(is_rect, x + columns.width, x + half_width)
+    bottom = np.where(is_rect, y + columns.height, y + half_height)
+    return left * scale, top * scale, right * scale, bottom * scale
+
+def bucket(first_x: np.ndarray, last_x: np.ndarray, first_y: np.ndarray, last_y: np.ndarray, cells_x: int, cells_y: int, keep: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """ Sorts items into the cells of a grid, given the first and last cell column and row each one spans
+            parameters:
+                first_x, last_x, first_y, last_y - np.ndarray, the inclusive cell span of every item, already clipped to the grid
+                cells_x - int, the number of cell columns
+                cells_y - int, the number of cell rows
+                keep - np.ndarray, a boolean mask of the items to sort in (all of them if None)
+            returns:
+                tuple, (items, starts) where the items of cell c (numbered row by row) are items[starts[c]:starts[c + 1]], in increasing order
+    """
+    spans_x = last_x - first_x + 1
+    spans_y = last_y - first_y + 1
+    pairs = spans_x * spans_y if keep is None else np.where(keep, spans_x * spans_y, 0)
+
+    #one (cell, item) pair for every cell an item spans
+    items = np.repeat(np.arange(len(first_x)), pairs)
+    offset = np.arange(len(items)) - np.repeat(np.cumsum(pairs) - pairs, pairs)
+    cells = (first_y[items] + offset // spans_x[items]) * cells_x + first_x[items] + offset % spans_x[items]
+
+    #a stable sort keeps the items of every cell in order, which for shapes is painter's order
+    order = np.argsort(cells, kind='stable')
+    starts = np.searchsorted(cells[order], np.arange(cells_x * cells_y + 1))
+    return items[order], starts
+
+def covers(columns: ShapeColumns, index: np.ndarray, x: float, y: float) -> np.ndarray:
+    """ Returns a boolean mask of which of the shapes at index actually paint the point x, y (not just their bounding box)"""
+    shape = columns.shape[index]
+    dx = x - columns.x[index].astype(np.float64)
+    dy = y - columns.y[index].astype(np.float64)
+    rad = columns.rad[index].astype(np.float64)
+    rx = columns.rx[index].astype(np.float64)
+    ry = columns.ry[index].astype(np.float64)
+    in_circle = dx ** 2 + dy ** 2 <= rad ** 2
+    in_rect = (dx >= 0) & (dy >= 0) & (dx <= columns.width[index]) & (dy <= columns.height[index])
+    in_ellipse = (dx * ry) ** 2 + (dy * rx) ** 2 <= (rx * ry) ** 2 #the ellipse equation multiplied out, so a zero radius does not divide
+    return np.where(shape == Shapes.CIRCLE.value, in_circle, np.where(shape == Shapes.RECTANGLE.value, in_rect, in_ellipse))
+
+def in_viewport(columns: ShapeColumns, canvas_width: int, canvas_height: int) -> np.ndarray:
+    """ Returns a boolean mask of the shapes that paint at least part of the svg canvas, everything else can be left out of the html unseen"""
+    left, top, right, bottom = bounds(columns)
+    inside = (right > 0) & (bottom > 0) & (left < canvas_width) & (top < canvas_height) & (right > left) & (bottom > top)
+
+    #a box can reach into a corner of the canvas while the round shape in it does not, so those are measured from the nearest canvas point
+    is_rect = columns.shape == Shapes.RECTANGLE.value
+    x = columns.x.astype(np.float64)
+    y = columns.y.astype(np.float64)
+    dx = np.clip(x, 0, canvas_width) - x
+    dy = np.clip(y, 0, canvas_height) - y
+    rx = np.where(columns.shape == Shapes.CIRCLE.value, columns.rad, columns.rx).astype(np.float64)
+    ry = np.where(columns.shape == Shapes.CIRCLE.value, columns.rad, columns.ry).astype(np.float64)
+    return inside & (is_rect | ((dx * ry) ** 2 + (dy * rx) ** 2 < (rx * ry) ** 2))
+
+
+class GridIndex:
+    """ Class that indexes a batch of shapes by the grid cells their bounding boxes overlap, for hit and overlap queries"""
+
+    def __init__(self, columns: ShapeColumns, cell_size: float | None = None) -> None:
+        """ Initalizes the class
+                parameters:
+                    columns - ShapeColumns, the shapes to index, in painter's order
+                    cell_size - float, width and height of a grid cell in svg units (by default about one shape per cell)
+        """
+        self.columns = columns
+        self.left, self.top, self.right, self.bottom = bounds(columns)
+        if len(columns) == 0:
+            self.origin, self.cell_size, self.cells_x, self.cells_y = (0.0, 0.0), 1.0, 1, 1
+            self.items, self.starts = np.empty(0, dtype=np.int64), np.zeros(2, dtype=np.int64)
+            return
+
+        self.origin = (float(self.left.min()), float(self.top.min()))
+        extent_x: float = float(self.right.max()) - self.origin[0]
+        extent_y: float = float(self.bottom.max()) - self.origin[1]
+        if cell_size is None:
+            #cells about as big as the average shape, but never so small that there are more cells than shapes
+            average: float = float(np.mean(self.right - self.left) + np.mean(self.bottom - self.top)) / 2
+            cell_size = max(average, (extent_x * extent_y / len(columns)) ** 0.5, 1.0)
+        self.cell_size: float = cell_size
+        self.cells_x: int = int(extent_x // cell_size) + 1
+        self.cells_y: int = int(extent_y // cell_size) + 1
+        self.items, self.starts = bucket(*self.cell_span(self.left, self.top, self.right, self.bottom), self.cells_x, self.cells_y)
+
+    def __len__(self) -> int:
+        """ returns the number of indexed shapes"""
+        return len(self.columns)
+
+    def cell_span(self, left, top, right, bottom) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """ returns the first and last cell column and row a box (or arrays of boxes) spans, clipped to the grid"""
+        first_x = np.clip(np.floor((np.asarray(left) - self.origin[0]) / self.cell_size), 0, self.cells_x - 1).astype(np.int64)
+        last_x = np.clip(np.floor((np.asarray(right) - self.origin[0]) / self.cell_size), 0, self.cells_x - 1).astype(np.int64)
+        first_y = np.clip(np.floor((np.asarray(top) - self.origin[1]) / self.cell_size), 0, self.cells_y - 1).astype(np.int64)
+        last_y = np.clip(np.floor((np.asarray(bottom) - self.origin[1]) / self.cell_size), 0, self.cells_y - 1).astype(np.int64)
+        return first_x, last_x, first_y, last_y
+
+    def candidates(self, left: float, top: float, right: float, bottom: float) -> np.ndarray:
+        """ returns the shapes filed under any cell the box overlaps, in painter's order (a superset of the shapes whose box overlaps it)"""
+        first_x, last_x, first_y, last_y = (int(value) for value in self.cell_span(left, top, right, bottom))
+        runs: list[np.ndarray] = [self.items[self.starts[row * self.cells_x + first_x]:self.starts[row * self.cells_x + last_x + 1]]
+                                  for row in range(first_y, last_y + 1)]
+        found = runs[0] if len(runs) == 1 else np.concatenate(runs)
+        return np.unique(found) if first_x != last_x or first_y != last_y else found
+
+    def query_rect(self, left: float, top: float, right: float, bottom: float) -> np.ndarray:
+        """ returns the shapes whose bounding box overlaps the box, in painter's order"""
+        if len(self) == 0:
+            return self.items
+        found = self.candidates(left, top, right, bottom)
+        hit = (self.left[found] <= right) & (self.right[found] >= left) & (self.top[found] <= bottom) & (self.bottom[found] >= top)
+        return found[hit]
+
+    def query_point(self, x: float, y: float) -> np.ndarray:
+        """ returns the shapes whose bounding box holds the point x, y, in painter's order"""
+        return self.query_rect(x, y, x, y)
+
+    def covering(self, x: float, y: float) -> np.ndarray:
+        """ returns the shapes that paint the point x, y, in painter's order (so the last one is on top)"""
+        found = self.query_point(x, y)
+        return found[covers(self.columns, found, x, y)]
+
+    def overlapping(self, index: int) -> np.ndarray:
+        """ returns the other shapes whose bounding box overlaps the bounding box of shape index, in painter's order"""
+        found = self.query_rect(self.left[index], self.top[index], self.right[index], self.bottom[index])
+        return found[found != index]
+
+def opaque(columns: ShapeColumns) -> np.ndarray:
+    """ Returns a boolean mask of the shapes that hide whatever is under them, ellipses are written without a fill-opacity so they always do"""
+    return (columns.shape == Shapes.ELLIPSE.value) | (columns.opacity >= 1.0)
+
+def holds(columns: ShapeColumns, cover: np.ndarray, shapes: np.ndarray, box: tuple[np.ndarray, ...], margin: float) -> np.ndarray:
+    """ Returns a boolean mask of the pairs where the occluder cover paints all of shapes grown by margin on every side
+            parameters:
+                columns - ShapeColumns, the scene the positions point into
+                cover - np.ndarray, the positions of the occluders
+                shapes - np.ndarray, the positions of the shapes, one per occluder
+                box - tuple, the left, top, right and bottom edge of every shape's bounding box, already grown by margin
+                margin - float, how far the occluder has to reach past the shape
+    """
+    left, top, right, bottom = box
+    is_rect = columns.shape[cover] == Shapes.RECTANGLE.value
+    is_circle = columns.shape[cover] == Shapes.CIRCLE.value
+    cx = columns.x[cover].astype(np.float64)
+    cy = columns.y[cover].astype(np.float64)
+
+    #rectangles hold the grown box of the shape, round occluders hold its farthest corner (they are convex)
+    in_rect = (cx <= left) & (cy <= top) & (cx + columns.width[cover] >= right) & (cy + columns.height[cover] >= bottom)
+    rx = np.where(is_circle, columns.rad[cover], columns.rx[cover]).astype(np.float64)
+    ry = np.where(is_circle, columns.rad[cover], columns.ry[cover]).astype(np.float64)
+    dx = np.maximum(np.abs(left - cx), np.abs(right - cx))
+    dy = np.maximum(np.abs(top - cy), np.abs(bottom - cy))
+    in_round = (dx * ry) ** 2 + (dy * rx) ** 2 <= (rx * ry) ** 2
+
+    #a circle holds a round shape whose own circle fits, which the corner test misses
+    kind = columns.shape[shapes]
+    reach = np.where(kind == Shapes.CIRCLE.value, columns.rad[shapes], np.maximum(columns.rx[shapes], columns.ry[shapes])).astype(np.float64)
+    distance = np.hypot(columns.x[shapes].astype(np.float64) - cx, columns.y[shapes].astype(np.float64) - cy)
+    in_circle = is_circle & (kind != Shapes.RECTANGLE.value) & (distance + reach + margin <= rx)
+    return np.where(is_rect, in_rect, in_round | in_circle)
+
+def occluded(columns: ShapeColumns, margin: float = 1.5, depth: int = 32, block: int = 1 << 16) -> np.ndarray:
+    """ Finds the shapes that are completely hidden under a later opaque shape, so leaving them out changes no pixel
+            parameters:
+                columns - ShapeColumns, the whole scene in painter's order
+                margin - float, how far (in svg units) the occluder has to reach past a shape on every side, so an anti-aliased edge cannot show through
+                depth - int, the most occluders checked per shape (the topmost ones over its centre), which bounds the work on very dense canvases
+                block - int, the number of shapes checked at a time, which bounds the memory of the candidate pairs
+            returns:
+                np.ndarray, a boolean mask of the hidden shapes, it never marks a shape that shows (but may miss a hidden one)
+    """
+    hidden = np.zeros(len(columns), dtype=bool)
+    occluders = np.flatnonzero(opaque(columns))
+    if occluders.size == 0:
+        return hidden
+    grid = GridIndex(columns.take(occluders))
+    left, top, right, bottom = bounds(columns)
+    grown_left, grown_top, grown_right, grown_bottom = left - margin, top - margin, right + margin, bottom + margin
+
+    #every run of the grid lists its occluders by increasing position in the scene, so a key of cell and position is sorted too
+    cells = np.repeat(np.arange(grid.cells_x * grid.cells_y), np.diff(grid.starts))
+    keys = cells * len(columns) + occluders[grid.items]
+    #an occluder that holds a shape holds its centre, so it is filed under the cell of the centre
+    first_x, _, first_y, _ = grid.cell_span((left + right) / 2, (top + bottom) / 2, 0, 0)
+    centre_cells = first_y * grid.cells_x + first_x
+
+    for start in range(0, len(columns), block):
+        index = np.arange(start, min(start + block, len(columns)))
+        cell = centre_cells[index]
+        #the occluders of the cell painted after the shape, capped to the topmost depth of them
+        end = grid.starts[cell + 1]
+        begin = np.maximum(np.searchsorted(keys, cell * len(columns) + index, side='right'), end - depth)
+        counts = np.maximum(end - begin, 0)
+        shapes = np.repeat(index, counts)
+        cover = occluders[grid.items[np.repeat(begin - np.cumsum(counts) + counts, counts) + np.arange(len(shapes))]]
+
+        #only an occluder whose own box holds the grown box of the shape can hold the shape
+        fits = ((left[cover] <= grown_left[shapes]) & (top[cover] <= grown_top[shapes]) &
+                (right[cover] >= grown_right[shapes]) & (bottom[cover] >= grown_bottom[shapes]))
+        shapes, cover = shapes[fits], cover[fits]
+        box = (grown_left[shapes], grown_top[shapes], grown_right[shapes], grown_bottom[shapes])
+        hidden[shapes[holds(columns, cover, shapes, box, margin)]] = True
+    return hidden
@@ -0,0 +1,61 @@
+import os
+import sys
+import pytest
+import a41
+
+EXPECTED: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'a41.html')
+
+def run_main(monkeypatch, *flags: str) -> str:
+    """ runs a41 with flags in the current directory, returns the html it wrote"""
+    monkeypatch.setattr(sys, 'argv', ['a41.py', *flags])
+    monkeypatch.setattr(sys, 'stdout', sys.stdout) #main writes through sys.stdout, this puts it back afterwards
+    a41.main()
+    with open('part1.html') as html:
+        return html.read()
+
+def test_default_rows(tmp_path, monkeypatch):
+    """ the default rows are the document kept in a41.html"""
+    monkeypatch.chdir(tmp_path)
+    with open(EXPECTED) as html:
+        assert run_main(monkeypatch) == html.read()
+
+def test_own_handle_stays_in_order(tmp_path, monkeypatch):
+    """ a SvgCanvas with a handle of its own writes after the header and before the end of the HtmlDoc"""
+    monkeypatch.chdir(tmp_path)
+    doc = a41.HtmlDoc(file="part1.html", title="My Art Part 1!!")
+    svg = a41.SvgCanvas(file="part1.html", shape=a41.CircleShape((50,50,50,"rgb(255, 0, 0)",1.0)), shape_type="circle")
+    svg.start_body()
+    svg.end_body()
+    doc.file.close()
+    svg.file.close()
+    with open('part1.html') as html, open(EXPECTED) as expected:
+        assert html.read() == expected.read()
+
+@pytest.mark.parametrize('shape, spacing', [('circle', 100), ('rectangle', 125), ('ellipse', 125)])
+def test_grid_spacing_follows_shape(tmp_path, monkeypatch, shape, spacing):
+    """ the copies of a pattern row are spaced for the chosen shape"""
+    monkeypatch.chdir(tmp_path)
+    lines = run_main(monkeypatch, '--shape', shape, '--copies', '3').splitlines()
+    tag = {'circle': '<circle cx=', 'rectangle': '<rect x=', 'ellipse': '<ellipse cx='}[shape]
+    starts = [int(line.split('"')[1]) for line in lines if tag in line]
+    assert starts == [50, 50 + spacing, 50 + 2 * spacing] * 2
+
+@pytest.mark.parametrize('flags, message', [
+    (['--scale', '0', '1', '2'], '--scale: COUNT 0'),
+    (['--scale', '2.5', '1', '2'], '--scale: COUNT 2.5'),
+    (['--scale', 'x', '1', '2'], 'invalid float value'),
+    (['--scale', '2', '-1', '2'], 'FIRST and LAST'),
+    (['--fade', '0', '1', '2', '3'], '--fade: COUNT 0'),
+    (['--fade', '2', '300', '0', '0'], 'RED, GREEN and BLUE'),
+    (['--fade', '2', 'red', '0', '0'], 'invalid int value'),
+    (['--radial', '0'], '--radial: COUNT 0'),
+    (['--copies', '0'], '--copies: COUNT 0'),
+])
+def test_bad_pattern_flags(tmp_path, monkeypatch, capsys, flags, message):
+    """ a bad pattern count or value is a usage error, not a traceback from the pattern engine"""
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(SystemExit) as exit:
+        run_main(monkeypatch, *flags)
+    assert exit.value.code == 2
+    assert message in capsys.readouterr().err
+    assert not os.path.exists('part1.html')
@@ -0,0 +1,94 @@
+import sys
+import pytest
+import a43
+from pyart import IntRange, SHAPE_FIELDS, ShapeStream, PyArtConfig
+from pyart.columns import gen_columns
+
+def make_job(tmp_path, **data) -> a43.RenderJob:
+    """ returns a seeded job writing into tmp_path, with data on top of the defaults"""
+    return a43.RenderJob.from_dict({'num_shapes': 0, 'canvas_width': 800, 'canvas_height': 600, 'seed': 7, 'file': str(tmp_path / 'out.html')} | data)
+
+def render_text(job: a43.RenderJob, monkeypatch, small: bool) -> str:
+    """ renders job through the pure Python path if small and the NumPy pipeline otherwise, returns the html"""
+    monkeypatch.setattr(a43, 'SMALL_RENDER', job.num_shapes if small else -1)
+    a43.render(job)
+    with open(job.file) as html:
+        return html.read()
+
+@pytest.mark.parametrize('count', [0, 1, 700])
+@pytest.mark.parametrize('shape_type', [(0, 2), (2, 2)])
+def test_small_path_matches_numpy_path(tmp_path, monkeypatch, count, shape_type):
+    """ the SvgCanvas path writes the same document as the NumPy pipeline"""
+    job = make_job(tmp_path, num_shapes=count, shape_type=shape_type)
+    assert render_text(job, monkeypatch, True) == render_text(job, monkeypatch, False)
+
+def test_small_path_matches_numpy_path_when_appending(tmp_path, monkeypatch):
+    """ shapes appended by either path are the same and differ from the ones already in the document"""
+    documents: list[str] = []
+    for small in (True, False):
+        render_text(make_job(tmp_path, num_shapes=50), monkeypatch, small)
+        documents.append(render_text(make_job(tmp_path, num_shapes=50, append=True), monkeypatch, small))
+    assert documents[0] == documents[1]
+    lines: list[str] = [line for line in documents[0].splitlines() if line.startswith('    <')]
+    assert len(lines) == 100 and lines[:50] != lines[50:]
+
+def test_shape_classes_match_gen_columns():
+    """ the shape classes draw the same shapes from a stream as gen_columns"""
+    config = PyArtConfig.from_dict({}, IntRange(0, 800))
+    columns = gen_columns(config, 300, IntRange(0, 2), ShapeStream(7, 0))
+    for index, (shape, shape_config) in enumerate(a43.shape_configs(config, 300, IntRange(0, 2), 7)):
+        instance = a43.RandomShape(shape_config, shape).get_shape()
+        assert shape.value == columns.shape[index]
+        for field in SHAPE_FIELDS[shape.value]:
+            assert getattr(instance, field) == getattr(columns, field)[index].item()
+
+@pytest.mark.parametrize('data, key', [
+    ({'rad': 'x'}, 'rad'),
+    ({'rad': (50, 10)}, 'rad'),
+    ({'opacity': (0, 'a')}, 'opacity'),
+    ({'ellipse': (1, 2, 3)}, 'rx'),
+    ({'num_shapes': 'many'}, 'num_shapes'),
+    ({'canvas_width': 0}, 'canvas'),
+    ({'shape_type': (0, 3)}, 'shape_type'),
+    ({'compress': ['zip']}, 'compress'),
+])
+def test_bad_config_values(tmp_path, data, key):
+    """ a malformed value is a ValueError naming its key"""
+    with pytest.raises(ValueError, match=key):
+        make_job(tmp_path, **({'num_shapes': 5} | data))
+
+def test_interactive_answers_are_checked(tmp_path, monkeypatch, capsys):
+    """ an inverted range typed in is a usage error, like the same range in a config file"""
+    path = tmp_path / 'i.html'
+    #shapes, shape type, canvas, then min and max of rad, ellipse, width, height, red, green, blue and opacity
+    answers = iter(['10', '0', '2', '100', '100', '50', '10', '1', '2', '1', '2', '1', '2', '0', '255', '0', '255', '0', '255', '0', '1'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    monkeypatch.setattr(sys, 'argv', ['a43.py', '--output', str(path)])
+    with pytest.raises(SystemExit) as exit:
+        a43.main()
+    assert exit.value.code == 2
+    assert 'rad: min 50 is greater than max 10' in capsys.readouterr().err
+    assert not path.exists()
+
+def test_missing_append_file(tmp_path, monkeypatch, capsys):
+    """ appending to a file that is not there is a ValueError, and a usage error from the command line"""
+    path = tmp_path / 'missing.html'
+    with pytest.raises(ValueError, match='append'):
+        a43.render(make_job(tmp_path, num_shapes=5, file=str(path), append=True))
+    monkeypatch.setattr(sys, 'argv', ['a43.py', '--shapes', '5', '--append', '--output', str(path)])
+    with pytest.raises(SystemExit) as exit:
+        a43.main()
+    assert exit.value.code == 2
+    assert 'append' in capsys.readouterr().err
+    assert not path.exists()
+
+@pytest.mark.parametrize('workers', ['0', '-1'])
+def test_workers_below_one(tmp_path, monkeypatch, capsys, workers):
+    """ --workers below 1 is a usage error before any file is opened"""
+    path = tmp_path / 'out.html'
+    monkeypatch.setattr(sys, 'argv', ['a43.py', '--workers', workers, '--shapes', '5', '--output', str(path)])
+    with pytest.raises(SystemExit) as exit:
+        a43.main()
+    assert exit.value.code == 2
+    assert '--workers' in capsys.readouterr().err
+    assert not path.exists()
@@ -0,0 +1,25 @@
+import a43
+from cache import RenderCache
+
+def test_cache_hit_returns_stored_document(tmp_path):
+    """ rendering the same seeded job again copies the stored files instead of rendering"""
+    cache = RenderCache(str(tmp_path / 'cache'))
+    path = tmp_path / 'out.html'
+    job = a43.RenderJob.from_dict({'num_shapes': 200, 'canvas_width': 800, 'canvas_height': 600, 'seed': 11, 'file': str(path), 'compress': ['gzip']})
+    assert cache.render(job) == 200
+    html, packed = path.read_bytes(), (tmp_path / 'out.html.gz').read_bytes()
+    path.unlink()
+    (tmp_path / 'out.html.gz').unlink()
+    assert cache.render(job) == 200
+    assert path.read_bytes() == html and (tmp_path / 'out.html.gz').read_bytes() == packed
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+
+def test_unseeded_job_bypasses_cache(tmp_path):
+    """ an unseeded job is random, so it is rendered every time and never stored"""
+    cache = RenderCache(str(tmp_path / 'cache'))
+    job = a43.RenderJob.from_dict({'num_shapes': 10, 'canvas_width': 80, 'canvas_height': 60, 'file': str(tmp_path / 'out.html')})
+    cache.render(job)
+    cache.render(job)
+    stats = cache.stats()
+    assert (stats.hits, stats.bypassed, stats.entries) == (0, 2, 0)
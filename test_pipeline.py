@@ -0,0 +1,12 @@
+import pytest
+from pyart import IntRange, PyArtConfig
+from pipeline import render_shapes
+
+@pytest.mark.parametrize('options', [{}, {'compact': True}, {'viewport': (400, 300)}])
+def test_workers_match_one_process(options):
+    """ the fragments written with worker processes are the ones written in this process"""
+    config = PyArtConfig.from_dict({}, IntRange(0, 800))
+    alone = list(render_shapes(config, 1000, workers=1, chunk_size=128, seed=3, **options))
+    pooled = list(render_shapes(config, 1000, workers=3, chunk_size=128, seed=3, **options))
+    assert alone == pooled
+    assert len(alone) == 8
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from pyart import IntRange, PyArtConfig
+from pipeline import generate_shapes
+from raster import WHITE, Raster, rasterize, render_tiled, write_png
+
+def test_render_tiled_empty_scene(tmp_path):
+    """ a render of 0 shapes saves an image of only the background"""
+    path = tmp_path / "empty.png"
+    render_tiled(iter(()), 300, 200, str(path), tile_size=64, workers=2)
+    expected = tmp_path / "expected.png"
+    write_png(Raster(300, 200).image(), str(expected))
+    assert path.read_bytes() == expected.read_bytes()
+
+def test_rasterize_empty_scene():
+    """ rasterize paints nothing over the background without any chunks"""
+    image = rasterize(iter(()), 30, 20)
+    assert image.shape == (20, 30, 4)
+    assert (image == np.array(WHITE, dtype=np.uint8)).all()
+
+@pytest.mark.parametrize('scale, tile_size', [(1.0, 64), (0.37, 16), (2.0, 100)])
+def test_render_tiled_matches_rasterize(tmp_path, scale, tile_size):
+    """ painting the canvas tile by tile gives the image rasterize paints in one go"""
+    config = PyArtConfig.from_dict({}, IntRange(0, 300))
+    chunks = list(generate_shapes(config, 400, chunk_size=150, seed=9))
+    framebuffer = str(tmp_path / 'tiles.npy')
+    render_tiled(iter(chunks), 300, 200, str(tmp_path / 'tiles.png'), scale, tile_size, workers=2, framebuffer=framebuffer)
+    assert np.array_equal(np.load(framebuffer), rasterize(iter(chunks), 300, 200, scale))
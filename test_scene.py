@@ -0,0 +1,27 @@
+import numpy as np
+from pyart import IntRange, PyArtConfig
+from pyart.columns import ShapeColumns
+from pipeline import generate_shapes, render_shapes
+from scene import Scene, write_scene, render_scene
+
+def test_scene_round_trip(tmp_path):
+    """ a scene file reads back the shapes written to it, and renders the same html as generating them"""
+    path = str(tmp_path / 'shapes.scene')
+    config = PyArtConfig.from_dict({}, IntRange(0, 800))
+    chunks = list(generate_shapes(config, 1000, chunk_size=300, seed=5))
+    assert write_scene(path, chunks, 1000, 800, 600) == 1000
+    scene = Scene(path)
+    assert (len(scene), scene.canvas_width, scene.canvas_height) == (1000, 800, 600)
+    expected = ShapeColumns.concat(chunks)
+    for field, column in zip(ShapeColumns._fields, scene.columns()):
+        assert np.array_equal(column, getattr(expected, field)), field
+    rendered = ''.join(fragment.text for fragment in render_scene(path, chunk_size=300))
+    assert rendered == ''.join(fragment.text for fragment in render_shapes(config, 1000, chunk_size=300, seed=5))
+
+def test_empty_scene_round_trip(tmp_path):
+    """ a scene of 0 shapes keeps its canvas and reads back no shapes"""
+    path = str(tmp_path / 'empty.scene')
+    write_scene(path, iter(()), 0, 30, 20)
+    scene = Scene(path)
+    assert (len(scene), scene.canvas_width, scene.canvas_height) == (0, 30, 20)
+    assert list(scene.chunks()) == []